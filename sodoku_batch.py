@@ -0,0 +1,147 @@
+import argparse
+import collections
+import concurrent.futures
+import itertools
+import os
+import sys
+import time
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from sodoku_io import read_puzzles
+from sodoku_solver import BACKENDS, SIZE, SOLVED, UNSOLVABLE, Sodoku, puzzle_to_string
+
+# Most chunks per worker submitted to the pool at a time, counting chunks that are done but wait for earlier ones to be
+# yielded. Puzzles are read as chunks are submitted, so memory stays bounded when streaming from large files
+CHUNKS_PER_WORKER = 4
+
+# Status of a puzzle that breaks the rules, on top of the solve statuses of sodoku_solver
+INVALID = 'invalid'
+
+
+# Outcome of solving one puzzle of a batch. index is the position of the puzzle in the input and solution is None
+# unless status is SOLVED
+class BatchResult(NamedTuple):
+    index: int
+    solution: Optional[List[List[str]]]
+    status: str
+    seconds: float
+
+
+# Solve one (index, puzzle, backend) job. Every job builds its own Sodoku from a copy of the puzzle, so nothing (the
+# puzzle, the solver stats) is shared between the puzzles a worker process solves
+def solve_job(job: Tuple[int, List[List[str]], str]) -> BatchResult:
+    index, puzzle, backend = job
+    start_time = time.perf_counter()
+    try:
+        # Bad puzzle lines kept by read_puzzles come through as strings. They were checked against the size of their
+        # stream, so they are not parsed again as a puzzle of whatever size their length fits
+        if isinstance(puzzle, str):
+            raise ValueError('Invalid puzzle line', puzzle)
+        sodoku = Sodoku(puzzle)
+        sodoku.init_set_values()
+        status = SOLVED if sodoku.solve_backend(backend) else UNSOLVABLE
+    except ValueError:
+        status = INVALID
+    solution = sodoku.set_values['puzzle'] if status == SOLVED else None
+    return BatchResult(index, solution, status, time.perf_counter() - start_time)
+
+
+# Solve a chunk of jobs in one worker process
+def solve_chunk(jobs: List[Tuple[int, List[List[str]], str]]) -> List[BatchResult]:
+    return [solve_job(job) for job in jobs]
+
+
+# Solve many 2D matrix puzzles, spreading them across a pool of worker processes
+# workers is the number of processes (all cores if None, no pool if 1) and chunksize the number of puzzles sent to a
+# worker at a time. Results are yielded in input order, or as soon as they are done if ordered is False.
+# puzzles are read lazily: a new chunk is submitted as soon as one is done, so workers don't wait for the slowest
+# puzzle of a window, and at most a few chunks per worker are read ahead
+def solve_many(puzzles: Iterable[List[List[str]]], workers: Optional[int] = None, chunksize: int = 1,
+               ordered: bool = True, backend: str = 'sets') -> Iterator[BatchResult]:
+    if backend != 'sets' and backend not in BACKENDS:
+        raise ValueError('Unknown backend', backend)
+    if workers is not None and workers < 1:
+        raise ValueError('There must be at least one worker', workers)
+    if chunksize < 1:
+        raise ValueError('Chunks must hold at least one puzzle', chunksize)
+    jobs = ((index, puzzle, backend) for index, puzzle in enumerate(puzzles))
+    if workers == 1:
+        yield from map(solve_job, jobs)
+        return
+    max_chunks = (workers or os.cpu_count() or 1) * CHUNKS_PER_WORKER
+    chunks = iter(lambda: list(itertools.islice(jobs, chunksize)), [])
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        # Submitted chunks in input order
+        submitted = collections.deque()
+        for chunk in itertools.islice(chunks, max_chunks):
+            submitted.append(executor.submit(solve_chunk, chunk))
+        while submitted:
+            # In order, only the first chunk can be yielded next. Waiting on chunks that are already done would return
+            # at once and spin the parent process while the workers need the cores
+            waiting = [submitted[0]] if ordered else submitted
+            concurrent.futures.wait(waiting, return_when=concurrent.futures.FIRST_COMPLETED)
+            if ordered:
+                done = []
+                while submitted and submitted[0].done():
+                    done.append(submitted.popleft())
+            else:
+                done = [future for future in submitted if future.done()]
+                for future in done:
+                    submitted.remove(future)
+            for future in done:
+                yield from future.result()
+            # Top up with as many chunks as were finished
+            for chunk in itertools.islice(chunks, max_chunks - len(submitted)):
+                submitted.append(executor.submit(solve_chunk, chunk))
+
+
+# Stream puzzles from a file (see read_puzzles) and write one line per puzzle as results come in:
+# <solution, or the puzzle if it was not solved> <status> <seconds>
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Solve many sodoku puzzles, one puzzle per line')
+    parser.add_argument('input', nargs='?', type=argparse.FileType('r'), default=sys.stdin,
+                        help='file of puzzles, one per line or as grids (default: stdin)')
+    parser.add_argument('--output', type=argparse.FileType('w'), default=sys.stdout,
+                        help='file to write results to (default: stdout)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--chunksize', type=int, default=1, help='puzzles sent to a worker at a time')
+    parser.add_argument('--size', type=int, default=SIZE, help='rows of every puzzle, like 16 for 16x16 (default: 9)')
+    parser.add_argument('--backend', default='sets', choices=['sets'] + list(BACKENDS))
+    parser.add_argument('--unordered', action='store_true', help='write results as soon as they are done')
+    parser.add_argument('--vectorized', action='store_true',
+                        help='sweep singles over many boards at once with numpy instead of using a process pool')
+    args = parser.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        parser.error('--workers must be at least 1')
+    if args.chunksize < 1:
+        parser.error('--chunksize must be at least 1')
+    if args.vectorized and args.size != SIZE:
+        parser.error('--vectorized only supports {0}x{0} puzzles'.format(SIZE))
+
+    # Puzzles that are being solved, so unsolved ones can be written back as they were
+    pending = {}
+
+    def remember(puzzles: Iterable[List[List[str]]]) -> Iterator[List[List[str]]]:
+        for index, puzzle in enumerate(puzzles):
+            pending[index] = puzzle
+            yield puzzle
+
+    # Bad puzzle lines come through as strings and are written back as invalid, so output lines match input lines
+    puzzles = remember(read_puzzles(args.input, args.size, keep_invalid=True))
+    if args.vectorized:
+        # numpy is only needed for this mode
+        from sodoku_numpy import solve_vectorized
+        results = solve_vectorized(puzzles)
+    else:
+        results = solve_many(puzzles, args.workers, args.chunksize, not args.unordered, args.backend)
+    for result in results:
+        puzzle = pending.pop(result.index)
+        if result.solution is not None:
+            puzzle = result.solution
+        line = puzzle if isinstance(puzzle, str) else puzzle_to_string(puzzle)
+        args.output.write('{} {} {:.6f}\n'.format(line, result.status, result.seconds))
+    args.output.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+import io
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+import sodoku_batch
+import sodoku_solver
+
+class TestSodokuBatchMethods(unittest.TestCase):
+
+    exampleEasyPuzzle = '1X7XX6XXXXX4XX98X7X5X2XXXX9379XX54XXX8X1X7X2XXX16XX7856XXXX8X9X9X84XX2XXX4X9XX1X8'
+    exampleHardPuzzle = '1234567897891234564XXXXXXXX234567891567891234XXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXX'
+    exampleHardPuzzle2 = 'XX6XX7X484X8XXXX9XX9X48XXX1XX5X2X3XXXXX354XXXXX3X6X7XX6XXX75X8XX8XXXX9X595X8XX4XX'
+    exampleWrongPuzzle = '123456789' * 9
+    # (0, 8) can only be a 9, but there is already a 9 in its col
+    exampleUnsolvablePuzzle = '12345678X' + 'XXXXXXXX9' + 'X' * 63
+
+    def setUp(self):
+        self.puzzles = [sodoku_solver.puzzle_from_string(puzzle) for puzzle in [
+            self.exampleEasyPuzzle, self.exampleHardPuzzle, self.exampleWrongPuzzle, self.exampleUnsolvablePuzzle,
+            self.exampleHardPuzzle2]]
+
+    def assertResults(self, results):
+        self.assertEqual([result.status for result in results], ['solved', 'solved', 'invalid', 'unsolvable', 'solved'])
+        for result, puzzle in zip(results, self.puzzles):
+            self.assertGreaterEqual(result.seconds, 0)
+            if result.status != 'solved':
+                self.assertIsNone(result.solution)
+                continue
+            sodoku = sodoku_solver.Sodoku(result.solution)
+            self.assertTrue(sodoku.is_solved())
+            for i in range(9):
+                for j in range(9):
+                    if puzzle[i][j] != 'X':
+                        self.assertEqual(result.solution[i][j], puzzle[i][j])
+
+    def test_solve_job(self):
+        result = sodoku_batch.solve_job((3, self.puzzles[0], 'sets'))
+        self.assertEqual(result.index, 3)
+        self.assertEqual(result.status, 'solved')
+        # The puzzle passed in is left as it was
+        self.assertEqual(sodoku_solver.puzzle_to_string(self.puzzles[0]), self.exampleEasyPuzzle)
+        # Puzzles of sizes no sodoku has are invalid like any other bad puzzle
+        result = sodoku_batch.solve_job((0, [['X'] * 8 for i in range(8)], 'sets'))
+        self.assertEqual((result.status, result.solution), ('invalid', None))
+        # Bad lines kept by read_puzzles are invalid, even if their length fits a puzzle of another size
+        result = sodoku_batch.solve_job((0, '.' * 16, 'sets'))
+        self.assertEqual((result.status, result.solution), ('invalid', None))
+
+    def test_solve_many_in_process(self):
+        for backend in ['sets', 'bitmask', 'dlx']:
+            results = list(sodoku_batch.solve_many(self.puzzles, workers=1, backend=backend))
+            self.assertEqual([result.index for result in results], list(range(5)))
+            self.assertResults(results)
+        with self.assertRaises(ValueError):
+            list(sodoku_batch.solve_many(self.puzzles, workers=1, backend='unknown'))
+        # A chunk of no puzzles would end the stream before any puzzle is solved
+        for options in [{'chunksize': 0}, {'workers': 0}]:
+            with self.assertRaises(ValueError):
+                list(sodoku_batch.solve_many(self.puzzles, **options))
+
+    def test_solve_many_pool(self):
+        results = list(sodoku_batch.solve_many(self.puzzles, workers=2, chunksize=2))
+        self.assertEqual([result.index for result in results], list(range(5)))
+        self.assertResults(results)
+        results = sorted(sodoku_batch.solve_many(self.puzzles, workers=2, ordered=False))
+        self.assertResults(results)
+
+    def test_solve_many_reads_ahead_a_few_chunks(self):
+        read = []
+
+        def puzzles():
+            for puzzle in self.puzzles * 20:
+                read.append(puzzle)
+                yield puzzle
+
+        results = sodoku_batch.solve_many(puzzles(), workers=2, chunksize=2)
+        next(results)
+        # 2 workers with CHUNKS_PER_WORKER chunks of 2 puzzles each, plus the chunks topped up after the first one
+        self.assertLessEqual(len(read), 2 * 2 * (sodoku_batch.CHUNKS_PER_WORKER + 1))
+        self.assertEqual(len(list(results)), 99)
+
+    def test_solve_many_waits_for_the_first_chunk(self):
+        # Chunks done behind a slow first one don't make the parent process spin while it waits in order
+        puzzles = [sodoku_solver.puzzle_from_string('X' * 625)] + self.puzzles * 4
+        start_cpu, start_time = time.process_time(), time.perf_counter()
+        results = list(sodoku_batch.solve_many(puzzles, workers=2))
+        self.assertEqual([result.index for result in results], list(range(21)))
+        self.assertLess(time.process_time() - start_cpu, (time.perf_counter() - start_time) / 4)
+
+    def test_main(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt') as input_file:
+            input_file.write('\n'.join([self.exampleHardPuzzle2, '', self.exampleWrongPuzzle, self.exampleEasyPuzzle[:-1],
+                                         self.exampleEasyPuzzle[:-1] + 'a', '.' * 16, self.exampleEasyPuzzle[:9],
+                                         self.exampleEasyPuzzle]) + '\n')
+            input_file.flush()
+            for options in [['--workers', '1'], ['--workers', '2'], ['--vectorized']]:
+                output = io.StringIO()
+                with redirect_stdout(output):
+                    sodoku_batch.main([input_file.name] + options)
+                lines = [line.split() for line in output.getvalue().splitlines()]
+                # Every puzzle line gets a result line in its place, bad ones included
+                self.assertEqual([line[1] for line in lines],
+                                 ['solved', 'invalid', 'invalid', 'invalid', 'invalid', 'invalid', 'solved'])
+                self.assertNotIn('X', lines[0][0])
+                self.assertEqual(lines[1][0], self.exampleWrongPuzzle)
+                self.assertEqual(lines[2][0], self.exampleEasyPuzzle[:-1])
+                self.assertEqual(lines[3][0], self.exampleEasyPuzzle[:-1] + 'a')
+                # A line as long as a 4x4 puzzle is not solved as one in a 9x9 stream
+                self.assertEqual(lines[4][0], '.' * 16)
+                # So is a cut short line as long as a row, which would otherwise start a grid
+                self.assertEqual(lines[5][0], self.exampleEasyPuzzle[:9])
+
+    def test_main_checks_options(self):
+        for options in [['--chunksize', '0'], ['--workers', '0'], ['--vectorized', '--size', '16']]:
+            with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+                sodoku_batch.main(['/dev/null'] + options)
+
+    def test_main_streams_to_output(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.sdm') as input_file, \
+                tempfile.NamedTemporaryFile('r', suffix='.txt') as output_file:
+            input_file.write('\n'.join([self.exampleEasyPuzzle, self.exampleUnsolvablePuzzle]) + '\n')
+            input_file.flush()
+            sodoku_batch.main([input_file.name, '--output', output_file.name, '--workers', '2', '--unordered'])
+            lines = sorted(line.split() for line in output_file)
+        self.assertEqual(sorted(line[1] for line in lines), ['solved', 'unsolvable'])
+        self.assertIn([self.exampleUnsolvablePuzzle, 'unsolvable'], [line[:2] for line in lines])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,254 @@
+import argparse
+import copy
+import gc
+import io
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from typing import Dict, Iterable, List, Optional
+
+from sodoku_io import read_puzzles
+from sodoku_rules import RULES
+from sodoku_solver import PAIR_RULES, SPACE_HEURISTICS, VALUE_HEURISTICS, Sodoku, puzzle_from_string
+
+# Puzzles used by the benchmarks, one row after another with X for unfilled spaces
+PUZZLES = {
+    'hard': '1234567897891234564XXXXXXXX234567891567891234XXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXX',
+    'hard2': 'XX6XX7X484X8XXXX9XX9X48XXX1XX5X2X3XXXXX354XXXXX3X6X7XX6XXX75X8XX8XXXX9X595X8XX4XX',
+    'empty': 'X' * 81,
+}
+
+# Bundled corpora, one .sdm file of puzzles per name in the corpora directory next to this file
+CORPORA_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpora')
+CORPORA = ['easy', 'medium', 'hard', 'hardest', 'empty']
+# Solver configurations to benchmark: name -> (backend, Sodoku keyword arguments)
+CONFIGS = {
+    'sets': ('sets', {}),
+    'sets-pairs': ('sets', {'rules': list(PAIR_RULES)}),
+    'sets-all-rules': ('sets', {'rules': list(RULES)}),
+    'bitmask': ('bitmask', {}),
+    'dlx': ('dlx', {}),
+}
+# Metrics compared against a baseline, and whether a higher value is better
+METRICS = {'puzzles_per_sec': True, 'p50_ms': False, 'p99_ms': False, 'nodes': False}
+# Metrics that fail a comparison by default. Search nodes are the same on every run, timings of corpora this small
+# move by tens of percent between runs of the same code, so they are only reported unless asked for
+GATED_METRICS = ('nodes',)
+# Seconds every (corpus, config) cell is timed for at least, running the corpus again until they are used up
+MIN_SECONDS = 0.5
+
+
+# Sodoku that saves state before every guess the way solve_helper used to, by deep-copying set_values and
+# possible_values, so it can be compared against the trail-based undo
+class DeepcopySodoku(Sodoku):
+    def save_state(self):
+        return copy.deepcopy(self.set_values), copy.deepcopy(self.possible_values), len(self.trail)
+
+    def restore_state(self, state):
+        self.set_values, self.possible_values, trail_length = state
+        del self.trail[trail_length:]
+
+
+# Solve a puzzle with the given Sodoku class and measure time, peak traced memory, and how many garbage collections
+# the allocations triggered
+def measure(sodoku_class, puzzle: str) -> Dict[str, float]:
+    gc.collect()
+    collections_before = sum(stats['collections'] for stats in gc.get_stats())
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    sodoku = sodoku_class(puzzle_from_string(puzzle))
+    with redirect_stdout(io.StringIO()):
+        sodoku.solve()
+    seconds = time.perf_counter() - start_time
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'seconds': seconds,
+        'peak_kib': peak / 1024,
+        'gc_collections': sum(stats['collections'] for stats in gc.get_stats()) - collections_before,
+        'decision_paths': sodoku.threads,
+    }
+
+
+# Compare memory and allocations of deepcopy snapshots against trail-based undo when backtracking
+def benchmark_backtracking():
+    print('{:<8}{:<10}{:>10}{:>12}{:>8}{:>8}'.format('puzzle', 'undo', 'seconds', 'peak KiB', 'gc', 'paths'))
+    for name, puzzle in PUZZLES.items():
+        for undo, sodoku_class in [('deepcopy', DeepcopySodoku), ('trail', Sodoku)]:
+            result = measure(sodoku_class, puzzle)
+            print('{:<8}{:<10}{:>10.4f}{:>12.1f}{:>8}{:>8}'.format(
+                name, undo, result['seconds'], result['peak_kib'], result['gc_collections'],
+                result['decision_paths']))
+
+
+# Compare decision paths (search nodes) explored and time taken by every combination of branching heuristics
+def benchmark_heuristics():
+    print('{:<8}{:<12}{:<12}{:>10}{:>8}'.format('puzzle', 'space', 'value', 'seconds', 'nodes'))
+    for name, puzzle in PUZZLES.items():
+        for space_heuristic in SPACE_HEURISTICS:
+            for value_heuristic in VALUE_HEURISTICS:
+                sodoku = Sodoku(puzzle_from_string(puzzle), space_heuristic, value_heuristic)
+                start_time = time.perf_counter()
+                with redirect_stdout(io.StringIO()):
+                    sodoku.solve()
+                print('{:<8}{:<12}{:<12}{:>10.4f}{:>8}'.format(
+                    name, space_heuristic, value_heuristic, time.perf_counter() - start_time, sodoku.threads))
+
+
+# Puzzles of a bundled corpus as 2D matrices
+def load_corpus(name: str) -> List[List[List[str]]]:
+    with open(os.path.join(CORPORA_DIRECTORY, name + '.sdm')) as file:
+        return list(read_puzzles(file))
+
+
+# Value below which a fraction p of the sorted values fall (nearest rank)
+def percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[max(math.ceil(p * len(values)) - 1, 0)]
+
+
+# Solve every puzzle of a corpus with one configuration and measure throughput, latency, search nodes, and (if
+# memory is true) the peak traced memory of the worst puzzle. The corpus is solved at least repeat times and until
+# min_seconds have passed, and the fastest time of every puzzle is kept, to keep noise out of comparisons between runs.
+# p99_ms is nearest rank, so for corpora of under 100 puzzles it is the slowest puzzle. Memory is traced in a separate
+# pass so tracing does not slow down the timed ones
+def benchmark_corpus(puzzles: List[List[List[str]]], config: str, memory: bool = True, repeat: int = 3,
+                     min_seconds: float = MIN_SECONDS) -> Dict[str, float]:
+    backend, options = CONFIGS[config]
+    latencies = [math.inf] * len(puzzles)
+    passes = 0
+    start_time = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        while passes < repeat or time.perf_counter() - start_time < min_seconds:
+            nodes = 0
+            solved = 0
+            for n, puzzle in enumerate(puzzles):
+                puzzle_start_time = time.perf_counter()
+                sodoku = Sodoku(puzzle, **options)
+                sodoku.init_set_values()
+                is_solved = sodoku.solve_backend(backend)
+                latencies[n] = min(latencies[n], time.perf_counter() - puzzle_start_time)
+                solved += is_solved
+                nodes += sodoku.threads
+            passes += 1
+
+        peak = 0
+        if memory:
+            tracemalloc.start()
+            for puzzle in puzzles:
+                tracemalloc.reset_peak()
+                sodoku = Sodoku(puzzle, **options)
+                sodoku.init_set_values()
+                sodoku.solve_backend(backend)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+    seconds = sum(latencies)
+    return {
+        'puzzles': len(puzzles),
+        'passes': passes,
+        'solved': solved,
+        'seconds': seconds,
+        'puzzles_per_sec': len(puzzles) / seconds if seconds else 0.0,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'nodes': nodes,
+        'peak_kib': peak / 1024 if memory else None,
+    }
+
+
+# Run every configuration over every corpus. Results are JSON-ready dicts keyed by corpus and config
+def benchmark_corpora(corpora: List[str] = CORPORA, configs: List[str] = list(CONFIGS), memory: bool = True,
+                      repeat: int = 3, min_seconds: float = MIN_SECONDS) -> List[Dict]:
+    results = []
+    for corpus in corpora:
+        puzzles = load_corpus(corpus)
+        for config in configs:
+            result = {'corpus': corpus, 'config': config, 'backend': CONFIGS[config][0]}
+            result.update(benchmark_corpus(puzzles, config, memory, repeat, min_seconds))
+            results.append(result)
+    return results
+
+
+# Compare results against baseline results of an earlier run
+# Return a message for every one of metrics that got worse by more than threshold (a fraction of the baseline value)
+def find_regressions(baseline: List[Dict], results: List[Dict], threshold: float = 0.25,
+                     metrics: Iterable[str] = METRICS) -> List[str]:
+    baseline = {(result['corpus'], result['config']): result for result in baseline}
+    regressions = []
+    for result in results:
+        before = baseline.get((result['corpus'], result['config']))
+        if before is None:
+            continue
+        for metric in metrics:
+            higher_is_better = METRICS[metric]
+            old, new = before[metric], result[metric]
+            if not old:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append('{} {} {}: {:.4g} -> {:.4g} ({:+.0%})'.format(
+                    result['corpus'], result['config'], metric, old, new, change))
+    return regressions
+
+
+# Run the corpus benchmarks, print a table to stderr and write the results as JSON
+# Return 1 if search nodes (or with --gate-timing, any metric) regressed from the --compare baseline, else 0
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the solver over the bundled corpora')
+    parser.add_argument('--corpus', nargs='+', default=CORPORA, choices=CORPORA)
+    parser.add_argument('--config', nargs='+', default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument('--output', type=argparse.FileType('w'), default=sys.stdout,
+                        help='file to write JSON results to (default: stdout)')
+    parser.add_argument('--compare', type=argparse.FileType('r'), help='JSON results of an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='fraction a metric may get worse by before it counts as a regression')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='times every corpus is solved at least, keeping the fastest time of every puzzle')
+    parser.add_argument('--min-seconds', type=float, default=MIN_SECONDS,
+                        help='seconds every corpus and config is timed for at least')
+    parser.add_argument('--gate-timing', action='store_true',
+                        help='fail on timing regressions too, not only on search nodes')
+    parser.add_argument('--no-memory', action='store_true', help='skip the peak memory pass')
+    parser.add_argument('--legacy', action='store_true',
+                        help='print the backtracking and heuristics comparisons instead')
+    args = parser.parse_args(argv)
+
+    if args.legacy:
+        benchmark_backtracking()
+        print()
+        benchmark_heuristics()
+        return 0
+
+    results = benchmark_corpora(args.corpus, args.config, not args.no_memory, args.repeat, args.min_seconds)
+    print('{:<9}{:<16}{:>10}{:>10}{:>10}{:>10}{:>10}'.format(
+        'corpus', 'config', 'puz/sec', 'p50 ms', 'p99 ms', 'nodes', 'peak KiB'), file=sys.stderr)
+    for result in results:
+        print('{:<9}{:<16}{:>10.1f}{:>10.2f}{:>10.2f}{:>10}{:>10}'.format(
+            result['corpus'], result['config'], result['puzzles_per_sec'], result['p50_ms'], result['p99_ms'],
+            result['nodes'], '-' if result['peak_kib'] is None else '{:.1f}'.format(result['peak_kib'])),
+            file=sys.stderr)
+    json.dump({'python': platform.python_version(), 'results': results}, args.output, indent=2)
+    args.output.write('\n')
+    args.output.flush()
+
+    if args.compare is None:
+        return 0
+    baseline = json.load(args.compare)['results']
+    gated = list(METRICS) if args.gate_timing else GATED_METRICS
+    regressions = find_regressions(baseline, results, args.threshold, gated)
+    for regression in regressions:
+        print('Regression: ' + regression, file=sys.stderr)
+    advisory = [metric for metric in METRICS if metric not in gated]
+    for change in find_regressions(baseline, results, args.threshold, advisory):
+        print('Slower (advisory): ' + change, file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+import sodoku_benchmark
+
+class TestSodokuBenchmarkMethods(unittest.TestCase):
+
+    def test_load_corpus(self):
+        for corpus in sodoku_benchmark.CORPORA:
+            puzzles = sodoku_benchmark.load_corpus(corpus)
+            self.assertGreater(len(puzzles), 0)
+            self.assertEqual(len(puzzles[0]), 9)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(sodoku_benchmark.percentile(values, 0.5), 50)
+        self.assertEqual(sodoku_benchmark.percentile(values, 0.99), 99)
+        self.assertEqual(sodoku_benchmark.percentile([3, 1, 2], 0.5), 2)
+        self.assertEqual(sodoku_benchmark.percentile([3], 0.99), 3)
+
+    def test_benchmark_corpus(self):
+        puzzles = sodoku_benchmark.load_corpus('hardest')[:2]
+        for config in sodoku_benchmark.CONFIGS:
+            result = sodoku_benchmark.benchmark_corpus(puzzles, config, repeat=1, min_seconds=0)
+            self.assertEqual((result['puzzles'], result['passes'], result['solved']), (2, 1, 2))
+            self.assertGreater(result['nodes'], 2)
+            self.assertGreater(result['peak_kib'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        # Small corpora are solved again until the minimum time is used up, without changing the node counts
+        single = sodoku_benchmark.benchmark_corpus(puzzles, 'bitmask', memory=False, repeat=1, min_seconds=0)
+        result = sodoku_benchmark.benchmark_corpus(puzzles, 'bitmask', False, 1, min_seconds=single['seconds'] * 5)
+        self.assertGreater(result['passes'], 1)
+        self.assertEqual(result['nodes'], single['nodes'])
+
+    def test_find_regressions(self):
+        baseline = [{'corpus': 'easy', 'config': 'sets', 'puzzles_per_sec': 100, 'p50_ms': 1, 'p99_ms': 2,
+                     'nodes': 20}]
+        results = [dict(baseline[0], puzzles_per_sec=90, p99_ms=3)]
+        regressions = sodoku_benchmark.find_regressions(baseline, results, threshold=0.25)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('p99_ms', regressions[0])
+        self.assertEqual(sodoku_benchmark.find_regressions(baseline, results, threshold=0.6), [])
+        self.assertEqual(sodoku_benchmark.find_regressions(baseline, [dict(results[0], config='dlx')]), [])
+        self.assertEqual(sodoku_benchmark.find_regressions(baseline, results, metrics=['nodes']), [])
+        regressions = sodoku_benchmark.find_regressions(baseline, [dict(results[0], nodes=30)], metrics=['nodes'])
+        self.assertEqual(len(regressions), 1)
+
+    def test_main(self):
+        with tempfile.NamedTemporaryFile('r', suffix='.json') as output_file:
+            with redirect_stderr(io.StringIO()):
+                code = sodoku_benchmark.main(['--corpus', 'easy', '--config', 'bitmask', '--repeat', '1',
+                                              '--min-seconds', '0', '--no-memory', '--output', output_file.name])
+            results = json.load(output_file)['results']
+        self.assertEqual(code, 0)
+        self.assertEqual([(result['corpus'], result['config']) for result in results], [('easy', 'bitmask')])
+
+        # A baseline that was far faster than anything can be is only reported, unless timings are gated
+        results[0]['puzzles_per_sec'] *= 1000
+        self.assertEqual(self.compare(results), 0)
+        self.assertIn('Slower (advisory): easy bitmask puzzles_per_sec', self.stderr)
+        self.assertEqual(self.compare(results, '--gate-timing'), 1)
+        self.assertIn('Regression: easy bitmask puzzles_per_sec', self.stderr)
+        # Searching more nodes than the baseline always fails
+        results[0]['nodes'] //= 2
+        self.assertEqual(self.compare(results), 1)
+        self.assertIn('Regression: easy bitmask nodes', self.stderr)
+
+    # Run main against baseline results and keep what it printed in self.stderr. Return the exit code
+    def compare(self, baseline, *options):
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as baseline_file:
+            json.dump({'results': baseline}, baseline_file)
+            baseline_file.flush()
+            with redirect_stderr(io.StringIO()) as stderr:
+                code = sodoku_benchmark.main(['--corpus', 'easy', '--config', 'bitmask', '--repeat', '1',
+                                              '--min-seconds', '0', '--no-memory', '--output', os.devnull,
+                                              '--compare', baseline_file.name] + list(options))
+        self.stderr = stderr.getvalue()
+        return code
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import functools
+from typing import List, Optional, Tuple
+
+from sodoku_board import get_box_size, get_group_table, get_peer_table, get_symbols
+
+
+# Group index of every flat space index, flat space indexes of every row, col, and group constraint, and flat space
+# indexes of the peers of every space. Built once per box size on first use
+@functools.lru_cache(maxsize=None)
+def get_unit_tables(box_size: int) -> Tuple[List[int], List[List[int]], List[List[int]]]:
+    size = box_size * box_size
+    group_index = [g for row in get_group_table(box_size) for g in row]
+    units = ([[i * size + j for j in range(size)] for i in range(size)]
+             + [[i * size + j for i in range(size)] for j in range(size)]
+             + [[index for index in range(size * size) if group_index[index] == g] for g in range(size)])
+    peers = [[k * size + l for k, l in peer_row] for row in get_peer_table(box_size) for peer_row in row]
+    return group_index, units, peers
+
+
+# Compact engine where every row, col, group, and cell candidate set is an integer bitmask instead of a set of value
+# strings. Boards are stored as flat lists of size^2 ints so snapshots before a guess are cheap list copies.
+class BitmaskSodoku:
+    def __init__(self, puzzle: List[List[str]]):
+        self.size = size = len(puzzle)
+        self.group_index, self.units, self.peers = get_unit_tables(get_box_size(size))
+        # Bitmask with one bit set for every value. Bit k represents the k-th symbol
+        self.all_values = (1 << size) - 1
+        # Value (as a string) for every single-bit mask
+        self.bit_to_value = {1 << k: symbol for k, symbol in enumerate(get_symbols(size))}
+        value_to_bit = {symbol: bit for bit, symbol in self.bit_to_value.items()}
+        # grid holds the placed value bit for every space, 0 for unfilled spaces
+        self.grid = [0] * (size * size)
+        # rows, cols, and groups hold a mask of values already placed in each constraint
+        self.rows = [0] * size
+        self.cols = [0] * size
+        self.groups = [0] * size
+        # masks holds the values that can still be placed in every unfilled space, 0 for filled spaces. Placing a
+        # value removes it from the masks of the space's peers, so masks are never worked out again
+        self.masks = [self.all_values] * (size * size)
+        # queued holds unfilled spaces whose mask dropped to one value (or none) and still need to be looked at
+        self.queued = []
+        self.threads = 0
+        for i in range(size):
+            for j in range(size):
+                if puzzle[i][j] == 'X':
+                    continue
+                if not self.place(i * size + j, value_to_bit[puzzle[i][j]]):
+                    raise ValueError('Puzzle is invalid and unsolvable!')
+
+    # Place a value bit into a space. Return False if the value is already used by one of the space's constraints
+    def place(self, index: int, bit: int) -> bool:
+        if not self.masks[index] & bit:
+            return False
+        i, j = divmod(index, self.size)
+        self.grid[index] = bit
+        self.rows[i] |= bit
+        self.cols[j] |= bit
+        self.groups[self.group_index[index]] |= bit
+        masks = self.masks
+        masks[index] = 0
+        for peer in self.peers[index]:
+            mask = masks[peer]
+            if mask & bit:
+                mask ^= bit
+                masks[peer] = mask
+                if not mask & (mask - 1):
+                    self.queued.append(peer)
+        return True
+
+    # Mask of values that can still be placed in an unfilled space
+    def candidates(self, index: int) -> int:
+        return self.masks[index]
+
+    # Place naked and hidden singles until nothing changes
+    # Return False if the board reaches a state that can never be solved
+    def fill_trivial_spaces(self) -> bool:
+        grid = self.grid
+        masks = self.masks
+        queued = self.queued
+        while True:
+            # If any space has only 1 possible value, then that space must have that possible value as the answer.
+            # Those spaces were queued by place as their masks shrank, so the board is not scanned for them
+            while queued:
+                index = queued.pop()
+                if grid[index]:
+                    continue
+                if not masks[index]:
+                    return False
+                self.place(index, masks[index])
+            was_changed = False
+            # If any constraint has only 1 spot a value can be placed, then the value can only be placed there.
+            # once collects values seen in at least one space of the constraint, twice values seen in more than one
+            for unit in self.units:
+                once = twice = placed = 0
+                for index in unit:
+                    if grid[index]:
+                        placed |= grid[index]
+                        continue
+                    mask = masks[index]
+                    twice |= once & mask
+                    once |= mask
+                if (once | placed) != self.all_values:
+                    return False
+                singles = once & ~twice
+                while singles:
+                    bit = singles & -singles
+                    singles ^= bit
+                    for index in unit:
+                        if masks[index] & bit:
+                            self.place(index, bit)
+                            was_changed = True
+                            break
+            if not was_changed:
+                return True
+
+    # Pick the unfilled space with the fewest candidates. Return None if the puzzle is solved
+    def most_constrained_space(self) -> Optional[int]:
+        best_index = None
+        best_count = self.size + 1
+        for index, mask in enumerate(self.masks):
+            if self.grid[index]:
+                continue
+            count = mask.bit_count()
+            if count < best_count:
+                best_index = index
+                best_count = count
+                if count <= 1:
+                    break
+        return best_index
+
+    # Try to solve by filling trivial spaces first.
+    # If that doesn't work, guess every candidate of the most constrained space in ascending order
+    # Return true if puzzle is solved
+    def solve_helper(self) -> bool:
+        self.threads += 1
+        if not self.fill_trivial_spaces():
+            return False
+        index = self.most_constrained_space()
+        if index is None:
+            return True
+        mask = self.masks[index]
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            # Save a flat copy of current puzzle state before making guesses and recursing through decision paths
+            snapshot = (self.grid[:], self.rows[:], self.cols[:], self.groups[:], self.masks[:])
+            self.place(index, bit)
+            if self.solve_helper():
+                return True
+            self.grid, self.rows, self.cols, self.groups, self.masks = snapshot
+            # A failed decision path can leave spaces queued that belong to the board given up on
+            self.queued = []
+        return False
+
+    # Solve the puzzle and return the solution as a 2D matrix of value strings, or None if it is unsolvable
+    def solve(self) -> Optional[List[List[str]]]:
+        if not self.solve_helper():
+            return None
+        return self.get_puzzle()
+
+    # Current board as a 2D matrix of value strings with 'X' for unfilled spaces
+    def get_puzzle(self) -> List[List[str]]:
+        size = self.size
+        return [[self.bit_to_value.get(self.grid[i * size + j], 'X') for j in range(size)] for i in range(size)]
+
@@ -0,0 +1,116 @@
+import unittest
+import sodoku_bitmask
+import sodoku_board
+import sodoku_solver
+
+class TestBitmaskSodokuMethods(unittest.TestCase):
+
+    exampleMediumPuzzle = [
+        ['9', 'X', 'X', '4', 'X', 'X', 'X', '3', '5'],
+        ['7', 'X', 'X', 'X', 'X', 'X', 'X', 'X', '9'],
+        ['X', '4', 'X', 'X', '5', '9', 'X', 'X', 'X'],
+        ['X', 'X', 'X', '9', '2', 'X', 'X', 'X', '3'],
+        ['6', '9', 'X', '8', 'X', '5', 'X', '2', '4'],
+        ['3', 'X', 'X', 'X', '1', '7', 'X', 'X', 'X'],
+        ['X', 'X', 'X', '7', '6', 'X', 'X', '4', 'X'],
+        ['4', 'X', 'X', 'X', 'X', 'X', 'X', 'X', '2'],
+        ['5', '8', 'X', 'X', 'X', '3', 'X', 'X', '6'],
+    ]
+
+    exampleHardPuzzle = [
+        ['1', '2', '3', '4', '5', '6', '7', '8', '9'],
+        ['7', '8', '9', '1', '2', '3', '4', '5', '6'],
+        ['4', 'X', 'X', 'X', 'X', 'X', 'X', 'X', 'X'],
+        ['2', '3', '4', '5', '6', '7', '8', '9', '1'],
+        ['5', '6', '7', '8', '9', '1', '2', '3', '4'],
+        ['X', 'X', 'X', 'X', 'X', 'X', 'X', 'X', 'X'],
+        ['X', 'X', 'X', 'X', 'X', 'X', 'X', 'X', 'X'],
+        ['X', 'X', 'X', 'X', 'X', 'X', 'X', 'X', 'X'],
+        ['X', 'X', 'X', 'X', 'X', 'X', 'X', 'X', 'X'],
+    ]
+
+    exampleHardPuzzle2 = [
+        ['X', 'X', '6', 'X', 'X', '7', 'X', '4', '8'],
+        ['4', 'X', '8', 'X', 'X', 'X', 'X', '9', 'X'],
+        ['X', '9', 'X', '4', '8', 'X', 'X', 'X', '1'],
+        ['X', 'X', '5', 'X', '2', 'X', '3', 'X', 'X'],
+        ['X', 'X', 'X', '3', '5', '4', 'X', 'X', 'X'],
+        ['X', 'X', '3', 'X', '6', 'X', '7', 'X', 'X'],
+        ['6', 'X', 'X', 'X', '7', '5', 'X', '8', 'X'],
+        ['X', '8', 'X', 'X', 'X', 'X', '9', 'X', '5'],
+        ['9', '5', 'X', '8', 'X', 'X', '4', 'X', 'X'],
+    ]
+
+    exampleWrongPuzzle = [[str(i) for i in range(1, 10)] for j in range(1, 10)]
+
+    # 25x25 puzzle made from a shifted pattern solution with every third space left unfilled
+    exampleHugePuzzle = [['X' if (i + 2 * j) % 3 == 0 else sodoku_board.SYMBOLS[(5 * (i % 5) + i // 5 + j) % 25]
+                          for j in range(25)] for i in range(25)]
+
+    def assertValidSolution(self, puzzle, solution):
+        for i in range(9):
+            for j in range(9):
+                if puzzle[i][j] != 'X':
+                    self.assertEqual(solution[i][j], puzzle[i][j])
+        digits = {str(d) for d in range(1, 10)}
+        for i in range(9):
+            self.assertEqual(set(solution[i]), digits)
+            self.assertEqual({solution[j][i] for j in range(9)}, digits)
+            self.assertEqual({solution[i // 3 * 3 + j // 3][i % 3 * 3 + j % 3] for j in range(9)}, digits)
+
+    def test_init(self):
+        sodoku = sodoku_bitmask.BitmaskSodoku(self.exampleMediumPuzzle)
+        self.assertEqual(sodoku.rows[0], 0b100011100)
+        self.assertEqual(sodoku.cols[0], 0b101111100)
+        self.assertEqual(sodoku.groups[0], 0b101001000)
+        self.assertEqual(sodoku.candidates(1), 0b000100011)
+        self.assertEqual(sodoku.get_puzzle(), self.exampleMediumPuzzle)
+        with self.assertRaises(ValueError):
+            sodoku_bitmask.BitmaskSodoku(self.exampleWrongPuzzle)
+
+    def test_fill_trivial_spaces(self):
+        sodoku = sodoku_bitmask.BitmaskSodoku(self.exampleMediumPuzzle)
+        self.assertTrue(sodoku.fill_trivial_spaces())
+        self.assertIsNone(sodoku.most_constrained_space())
+        sodoku = sodoku_bitmask.BitmaskSodoku(self.exampleHardPuzzle)
+        self.assertTrue(sodoku.fill_trivial_spaces())
+        self.assertIsNotNone(sodoku.most_constrained_space())
+        # Masks kept up to date while placing match masks worked out from the constraints
+        sodoku = sodoku_bitmask.BitmaskSodoku(self.exampleHardPuzzle2)
+        self.assertTrue(sodoku.fill_trivial_spaces())
+        for index, mask in enumerate(sodoku.masks):
+            i, j = divmod(index, 9)
+            used = sodoku.rows[i] | sodoku.cols[j] | sodoku.groups[sodoku.group_index[index]]
+            self.assertEqual(mask, 0 if sodoku.grid[index] else sodoku.all_values & ~used)
+
+    def test_solve(self):
+        for puzzle in [self.exampleMediumPuzzle, self.exampleHardPuzzle, self.exampleHardPuzzle2]:
+            self.assertValidSolution(puzzle, sodoku_bitmask.BitmaskSodoku(puzzle).solve())
+
+    def test_solve_matches_sets_backend(self):
+        for puzzle in [self.exampleMediumPuzzle, self.exampleHardPuzzle2]:
+            sets = sodoku_solver.Sodoku(puzzle)
+            sets.solve()
+            bitmask = sodoku_solver.Sodoku(puzzle)
+            bitmask.solve(backend='bitmask')
+            self.assertTrue(bitmask.is_solved())
+            self.assertEqual(bitmask.set_values['puzzle'], sets.set_values['puzzle'])
+
+        with self.assertRaises(ValueError):
+            sodoku_solver.Sodoku(self.exampleMediumPuzzle).solve(backend='unknown')
+
+    def test_other_sizes(self):
+        puzzle = sodoku_solver.puzzle_from_string('3.....3...23.3.4')
+        solution = sodoku_bitmask.BitmaskSodoku(puzzle).solve()
+        self.assertEqual(solution[3], ['2', '3', '1', '4'])
+        for puzzle in [sodoku_solver.puzzle_from_string('.' * 256), self.exampleHugePuzzle]:
+            solution = sodoku_bitmask.BitmaskSodoku(puzzle).solve()
+            symbols = set(sodoku_board.get_symbols(len(puzzle)))
+            for i in range(len(puzzle)):
+                self.assertEqual(set(solution[i]), symbols)
+                self.assertEqual({row[i] for row in solution}, symbols)
+                for j in range(len(puzzle)):
+                    self.assertIn(puzzle[i][j], ('X', solution[i][j]))
+
+if __name__ == '__main__':
+    unittest.main()
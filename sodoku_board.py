@@ -0,0 +1,50 @@
+import functools
+import math
+from typing import List, Tuple
+
+# Default width and height of a group. Puzzles are (BOX_SIZE^2)x(BOX_SIZE^2) spaces, 9x9 by default
+BOX_SIZE = 3
+# Symbols used for values, in order. A puzzle of size N uses the first N, so 16x16 puzzles use 1-9 and A-G
+SYMBOLS = '123456789ABCDEFGHIJKLMNOP'
+
+
+# Box size of a puzzle with size rows. Raise ValueError if there is no such sodoku
+def get_box_size(size: int) -> int:
+    box_size = math.isqrt(size)
+    if size < 1 or box_size * box_size != size or size > len(SYMBOLS):
+        raise ValueError('Puzzle size must be 4, 9, 16, or 25', size)
+    return box_size
+
+
+# Symbols used by the values of a puzzle with size rows
+def get_symbols(size: int) -> str:
+    return SYMBOLS[:size]
+
+
+# Group index of every space as a 2D matrix. Groups are numbered row by row, so with 3x3 groups [1][2] maps to the
+# group covering rows 3-5 and cols 6-8, which is 5
+@functools.lru_cache(maxsize=None)
+def get_group_table(box_size: int) -> List[List[int]]:
+    size = box_size * box_size
+    return [[(i // box_size) * box_size + j // box_size for j in range(size)] for i in range(size)]
+
+
+# All coordinates sharing a row, col, or group with each space, as a 2D matrix. Built once per box size on first
+# use and shared by every puzzle, since it never changes
+@functools.lru_cache(maxsize=None)
+def get_peer_table(box_size: int) -> List[List[List[Tuple[int, int]]]]:
+    size = box_size * box_size
+    groups = get_group_table(box_size)
+    return [[[(k, l) for k in range(size) for l in range(size)
+              if (k, l) != (i, j) and (k == i or l == j or groups[k][l] == groups[i][j])]
+             for j in range(size)] for i in range(size)]
+
+
+# Coordinates of the spaces of every row, col, and group, in that order
+@functools.lru_cache(maxsize=None)
+def get_unit_table(box_size: int) -> List[List[Tuple[int, int]]]:
+    size = box_size * box_size
+    groups = get_group_table(box_size)
+    return ([[(i, j) for j in range(size)] for i in range(size)]
+            + [[(i, j) for i in range(size)] for j in range(size)]
+            + [[(i, j) for i in range(size) for j in range(size) if groups[i][j] == g] for g in range(size)])
@@ -0,0 +1,42 @@
+import unittest
+import sodoku_board
+
+class TestSodokuBoardMethods(unittest.TestCase):
+
+    def test_get_box_size(self):
+        self.assertEqual(sodoku_board.get_box_size(4), 2)
+        self.assertEqual(sodoku_board.get_box_size(9), 3)
+        self.assertEqual(sodoku_board.get_box_size(16), 4)
+        self.assertEqual(sodoku_board.get_box_size(25), 5)
+        for size in [0, 8, 36]:
+            with self.assertRaises(ValueError):
+                sodoku_board.get_box_size(size)
+
+    def test_get_symbols(self):
+        self.assertEqual(sodoku_board.get_symbols(4), '1234')
+        self.assertEqual(sodoku_board.get_symbols(9), '123456789')
+        self.assertEqual(sodoku_board.get_symbols(16), '123456789ABCDEFG')
+        self.assertEqual(len(sodoku_board.get_symbols(25)), 25)
+
+    def test_get_group_table(self):
+        groups = sodoku_board.get_group_table(3)
+        self.assertEqual(groups[2][3], 1)
+        self.assertEqual(groups[3][2], 3)
+        self.assertEqual(groups[8][8], 8)
+        groups = sodoku_board.get_group_table(4)
+        self.assertEqual(groups[3][4], 1)
+        self.assertEqual(groups[4][3], 4)
+        self.assertEqual(groups[15][15], 15)
+
+    def test_get_peer_table(self):
+        for box_size in [2, 3, 4, 5]:
+            size = box_size * box_size
+            peers = sodoku_board.get_peer_table(box_size)
+            self.assertEqual(len(peers[0][0]), 3 * size - 2 * box_size - 1)
+            self.assertNotIn((0, 0), peers[0][0])
+        self.assertIn((1, 1), sodoku_board.get_peer_table(3)[0][0])
+        self.assertNotIn((3, 3), sodoku_board.get_peer_table(3)[0][0])
+        self.assertIs(sodoku_board.get_peer_table(3), sodoku_board.get_peer_table(3))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,214 @@
+import collections
+import itertools
+import math
+import shelve
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+from sodoku_board import get_box_size, get_symbols
+from sodoku_solver import Sodoku
+
+# Most transforms tried when looking for the canonical form of a puzzle. Very symmetric puzzles (like nearly empty
+# boards) tie on too many of them and are not cached
+MAX_CANDIDATES = 2000
+# Stored in place of a solution for puzzles that have none
+UNSOLVABLE = ''
+
+
+# A box-preserving transform of a puzzle into its canonical form: transpose it if transpose is true, then take rows
+# and cols in the given order and relabel values with relabel. key is the canonical puzzle as one line
+class CanonicalForm(NamedTuple):
+    key: str
+    transpose: bool
+    rows: List[int]
+    cols: List[int]
+    relabel: Dict[str, str]
+
+
+# Every order of items where items are sorted by key and items with equal keys are taken in every order
+def tied_orders(items: Sequence[int], key) -> Iterator[List[int]]:
+    groups = [list(group) for _, group in itertools.groupby(sorted(items, key=key), key=key)]
+    for orders in itertools.product(*(itertools.permutations(group) for group in groups)):
+        yield [item for order in orders for item in order]
+
+
+# Number of orders tied_orders yields
+def count_tied_orders(items: Sequence[int], key) -> int:
+    return math.prod(math.factorial(len(list(group)))
+                     for _, group in itertools.groupby(sorted(items, key=key), key=key))
+
+
+# Keys of every row that do not change when cols are reordered (within the box structure) or values are relabeled:
+# its number of values, the number of values in the col of each of them, how often each of its values shows up in the
+# puzzle, and how its values are spread across stacks
+def get_row_keys(puzzle: List[List[str]], box_size: int) -> List[tuple]:
+    size = len(puzzle)
+    col_counts = [sum(row[j] != 'X' for row in puzzle) for j in range(size)]
+    frequencies = collections.Counter(value for row in puzzle for value in row if value != 'X')
+    keys = []
+    for row in puzzle:
+        filled = [j for j in range(size) if row[j] != 'X']
+        stacks = sorted(sum(row[j] != 'X' for j in range(stack * box_size, (stack + 1) * box_size))
+                        for stack in range(box_size))
+        keys.append((len(filled), tuple(sorted(col_counts[j] for j in filled)),
+                     tuple(sorted(frequencies[row[j]] for j in filled)), tuple(stacks)))
+    return keys
+
+
+# Every row order that sorts bands by their row keys and rows within each band by their keys
+def get_line_orders(keys: List[tuple], box_size: int) -> Iterator[List[int]]:
+    bands = [list(range(band * box_size, (band + 1) * box_size)) for band in range(box_size)]
+    band_keys = [tuple(sorted(keys[i] for i in band)) for band in bands]
+    for band_order in tied_orders(range(box_size), band_keys.__getitem__):
+        for orders in itertools.product(*(tied_orders(bands[band], keys.__getitem__) for band in band_order)):
+            yield [i for order in orders for i in order]
+
+
+# Number of orders get_line_orders yields
+def count_line_orders(keys: List[tuple], box_size: int) -> int:
+    bands = [list(range(band * box_size, (band + 1) * box_size)) for band in range(box_size)]
+    band_keys = [tuple(sorted(keys[i] for i in band)) for band in bands]
+    count = count_tied_orders(range(box_size), band_keys.__getitem__)
+    for band in bands:
+        count *= count_tied_orders(band, keys.__getitem__)
+    return count
+
+
+# Canonical form of a puzzle, shared by every puzzle it can be turned into by transposing, reordering bands, stacks,
+# and the rows and cols within them, and relabeling values. Return None if the puzzle is too symmetric to find it
+# Only transforms that sort rows and cols by keys that none of these transforms change are tried, which gives the same
+# set of candidates for every puzzle of a symmetry class. The canonical form is the smallest of them as one line,
+# with values relabeled in the order they first show up
+def canonicalize(puzzle: List[List[str]]) -> Optional[CanonicalForm]:
+    size = len(puzzle)
+    box_size = get_box_size(size)
+    orientations = []
+    for transpose in [False, True]:
+        grid = [list(row) for row in zip(*puzzle)] if transpose else puzzle
+        row_keys = get_row_keys(grid, box_size)
+        col_keys = get_row_keys([list(row) for row in zip(*grid)], box_size)
+        signature = (sorted(row_keys), sorted(col_keys))
+        orientations.append((signature, transpose, grid, row_keys, col_keys))
+    # Only the orientation with the smaller signature is tried, both if they are equal
+    smallest = min(signature for signature, *_ in orientations)
+    orientations = [orientation for orientation in orientations if orientation[0] == smallest]
+
+    candidates = sum(count_line_orders(row_keys, box_size) * count_line_orders(col_keys, box_size)
+                     for _, _, _, row_keys, col_keys in orientations)
+    if candidates > MAX_CANDIDATES:
+        return None
+    symbols = get_symbols(size)
+    best = None
+    for _, transpose, grid, row_keys, col_keys in orientations:
+        col_orders = list(get_line_orders(col_keys, box_size))
+        for rows in get_line_orders(row_keys, box_size):
+            ordered_rows = [grid[i] for i in rows]
+            for cols in col_orders:
+                relabel = {}
+                line = []
+                for row in ordered_rows:
+                    for j in cols:
+                        value = row[j]
+                        if value == 'X':
+                            line.append('X')
+                            continue
+                        if value not in relabel:
+                            relabel[value] = symbols[len(relabel)]
+                        line.append(relabel[value])
+                key = ''.join(line)
+                if best is None or key < best.key:
+                    best = CanonicalForm(key, transpose, rows, cols, relabel)
+    # Values missing from the puzzle are interchangeable, so they take the labels left over in ascending order
+    missing = [value for value in symbols if value not in best.relabel]
+    unused = [value for value in symbols if value not in best.relabel.values()]
+    best.relabel.update(zip(missing, unused))
+    return best
+
+
+# Turn a full board of the puzzle into its canonical form as one line
+def to_canonical(board: List[List[str]], form: CanonicalForm) -> str:
+    grid = [list(row) for row in zip(*board)] if form.transpose else board
+    return ''.join(form.relabel.get(grid[i][j], 'X') for i in form.rows for j in form.cols)
+
+
+# Turn a board in canonical form (as one line) back into a board of the puzzle
+def from_canonical(line: str, form: CanonicalForm) -> List[List[str]]:
+    size = len(form.rows)
+    unlabel = {label: value for value, label in form.relabel.items()}
+    grid = [['X'] * size for i in range(size)]
+    for k, value in enumerate(line):
+        grid[form.rows[k // size]][form.cols[k % size]] = unlabel.get(value, 'X')
+    return [list(row) for row in zip(*grid)] if form.transpose else grid
+
+
+# True if board is a full, valid board that keeps every value of puzzle
+def is_solution(puzzle: List[List[str]], board: List[List[str]]) -> bool:
+    if any(value != 'X' and value != board[i][j] for i, row in enumerate(puzzle) for j, value in enumerate(row)):
+        return False
+    return Sodoku([row[:] for row in board]).is_solved()
+
+
+# LRU cache of solutions keyed by canonical form, so a puzzle that was solved before in any relabeled, transposed,
+# or permuted form is not searched again. Up to maxsize solutions are kept in memory; if path is given, every solution
+# is also kept in a shelve database there, which outlives the process
+class SolutionCache:
+    def __init__(self, maxsize: int = 4096, path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.memory = collections.OrderedDict()
+        self.disk = shelve.open(path) if path is not None else None
+        self.hits = 0
+        self.misses = 0
+
+    # Canonical solution stored under key, or None if there is none
+    def get(self, key: str) -> Optional[str]:
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+        if self.disk is not None and key in self.disk:
+            solution = self.disk[key]
+            self.remember(key, solution)
+            return solution
+        return None
+
+    # Store a canonical solution under key
+    def put(self, key: str, solution: str):
+        self.remember(key, solution)
+        if self.disk is not None:
+            self.disk[key] = solution
+
+    # Keep a solution in memory, forgetting the least recently used one if there are too many
+    def remember(self, key: str, solution: str):
+        self.memory[key] = solution
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.maxsize:
+            self.memory.popitem(last=False)
+
+    # Solve a puzzle, looking it up by canonical form first and storing what the search finds
+    # Return the solution as a 2D matrix, or None if the puzzle is unsolvable. Raise ValueError if it is invalid
+    def solve(self, puzzle: List[List[str]], backend: str = 'sets') -> Optional[List[List[str]]]:
+        # Bad puzzle lines kept by read_puzzles are strings, and are not parsed again as a puzzle of another size
+        if isinstance(puzzle, str):
+            raise ValueError('Invalid puzzle line', puzzle)
+        form = canonicalize(puzzle)
+        if form is not None:
+            cached = self.get(form.key)
+            if cached == UNSOLVABLE:
+                self.hits += 1
+                return None
+            if cached is not None:
+                solution = from_canonical(cached, form)
+                # A cached solution is only trusted if it really solves this puzzle
+                if is_solution(puzzle, solution):
+                    self.hits += 1
+                    return solution
+        self.misses += 1
+        sodoku = Sodoku(puzzle)
+        sodoku.init_set_values()
+        solution = sodoku.set_values['puzzle'] if sodoku.solve_backend(backend) else None
+        if form is not None:
+            self.put(form.key, UNSOLVABLE if solution is None else to_canonical(solution, form))
+        return solution
+
+    # Close the disk database, if there is one
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
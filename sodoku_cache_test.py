@@ -0,0 +1,93 @@
+import os
+import random
+import tempfile
+import unittest
+import sodoku_cache
+import sodoku_solver
+
+class TestSodokuCacheMethods(unittest.TestCase):
+
+    exampleEasyPuzzle = '1X7XX6XXXXX4XX98X7X5X2XXXX9379XX54XXX8X1X7X2XXX16XX7856XXXX8X9X9X84XX2XXX4X9XX1X8'
+    exampleHardPuzzle2 = 'XX6XX7X484X8XXXX9XX9X48XXX1XX5X2X3XXXXX354XXXXX3X6X7XX6XXX75X8XX8XXXX9X595X8XX4XX'
+    # exampleHardPuzzle2 with a 1 that breaks no rule but leaves no solution
+    exampleUnsolvablePuzzle = '1X6XX7X484X8XXXX9XX9X48XXX1XX5X2X3XXXXX354XXXXX3X6X7XX6XXX75X8XX8XXXX9X595X8XX4XX'
+
+    def setUp(self):
+        self.easy = sodoku_solver.puzzle_from_string(self.exampleEasyPuzzle)
+        self.hard2 = sodoku_solver.puzzle_from_string(self.exampleHardPuzzle2)
+
+    # Shuffle bands, stacks, and the rows and cols within them, maybe transpose, and relabel values
+    def shuffle(self, puzzle, rng):
+        rows = [band * 3 + i for band in rng.sample(range(3), 3) for i in rng.sample(range(3), 3)]
+        cols = [stack * 3 + j for stack in rng.sample(range(3), 3) for j in rng.sample(range(3), 3)]
+        grid = [[puzzle[i][j] for j in cols] for i in rows]
+        if rng.random() < 0.5:
+            grid = [list(row) for row in zip(*grid)]
+        relabel = dict(zip('123456789', rng.sample('123456789', 9)), X='X')
+        return [[relabel[value] for value in row] for row in grid]
+
+    def test_canonicalize(self):
+        rng = random.Random(1)
+        for puzzle in [self.easy, self.hard2]:
+            key = sodoku_cache.canonicalize(puzzle).key
+            self.assertEqual(key.count('X'), sodoku_solver.puzzle_to_string(puzzle).count('X'))
+            for _ in range(5):
+                self.assertEqual(sodoku_cache.canonicalize(self.shuffle(puzzle, rng)).key, key)
+        self.assertNotEqual(sodoku_cache.canonicalize(self.easy).key, sodoku_cache.canonicalize(self.hard2).key)
+        # An empty board ties on every transform
+        self.assertIsNone(sodoku_cache.canonicalize([['X'] * 9 for i in range(9)]))
+
+    def test_to_from_canonical(self):
+        form = sodoku_cache.canonicalize(self.hard2)
+        self.assertEqual(sodoku_cache.to_canonical(self.hard2, form), form.key)
+        self.assertEqual(sodoku_cache.from_canonical(form.key, form), self.hard2)
+
+    def test_solve(self):
+        cache = sodoku_cache.SolutionCache()
+        solution = cache.solve(self.hard2)
+        self.assertTrue(sodoku_cache.is_solution(self.hard2, solution))
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        shuffled = self.shuffle(self.hard2, random.Random(2))
+        self.assertTrue(sodoku_cache.is_solution(shuffled, cache.solve(shuffled)))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        unsolvable = sodoku_solver.puzzle_from_string(self.exampleUnsolvablePuzzle)
+        self.assertIsNone(cache.solve(unsolvable))
+        self.assertIsNone(cache.solve(unsolvable))
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+        # Puzzles too symmetric to cache are still solved
+        empty = [['X'] * 9 for i in range(9)]
+        self.assertTrue(sodoku_cache.is_solution(empty, cache.solve(empty)))
+        # Bad lines kept by read_puzzles are not parsed again
+        with self.assertRaises(ValueError):
+            cache.solve('.' * 16)
+
+    def test_solve_checks_cached_solutions(self):
+        cache = sodoku_cache.SolutionCache()
+        form = sodoku_cache.canonicalize(self.easy)
+        cache.put(form.key, '1' * 81)
+        self.assertTrue(sodoku_cache.is_solution(self.easy, cache.solve(self.easy)))
+        self.assertEqual(cache.misses, 1)
+
+    def test_lru(self):
+        cache = sodoku_cache.SolutionCache(maxsize=2)
+        cache.put('a', '1')
+        cache.put('b', '2')
+        self.assertEqual(cache.get('a'), '1')
+        cache.put('c', '3')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(list(cache.memory), ['a', 'c'])
+
+    def test_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'solutions')
+            cache = sodoku_cache.SolutionCache(path=path)
+            solution = cache.solve(self.hard2)
+            cache.close()
+            cache = sodoku_cache.SolutionCache(path=path)
+            self.assertEqual(cache.solve(self.hard2), solution)
+            self.assertEqual((cache.hits, cache.misses), (1, 0))
+            cache.close()
+
+if __name__ == '__main__':
+    unittest.main()
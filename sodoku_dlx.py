@@ -0,0 +1,158 @@
+from typing import Iterator, List, Optional
+
+from sodoku_board import get_box_size, get_group_table, get_symbols
+
+
+# Solver that models the puzzle as an exact cover problem and solves it with Dancing Links (Algorithm X).
+# Each of the size^3 (row, col, value) choices is a matrix row covering 4 of the columns constraints. The matrix is a
+# toroidal doubly linked list kept in flat int lists: left, right, up, and down links plus the column header of
+# every node. Node 0 is the root and nodes 1..columns are the column headers.
+class DLXSodoku:
+    def __init__(self, puzzle: List[List[str]]):
+        self.size = len(puzzle)
+        self.symbols = get_symbols(self.size)
+        self.group_indexes = get_group_table(get_box_size(self.size))
+        # Every space, row-value, col-value, and group-value pair must be covered exactly once
+        self.columns = columns = 4 * self.size * self.size
+        self.left = list(range(-1, columns))
+        self.right = list(range(1, columns + 2))
+        self.left[0] = columns
+        self.right[columns] = 0
+        self.up = list(range(columns + 1))
+        self.down = list(range(columns + 1))
+        self.column = list(range(columns + 1))
+        # sizes holds the number of nodes left in every column
+        self.sizes = [0] * (columns + 1)
+        # choices holds the (i, j, value) choice of every node
+        self.choices = [None] * (columns + 1)
+        # solution is the stack of nodes of the choices made so far
+        self.solution = []
+        self.threads = 0
+
+        for i in range(self.size):
+            for j in range(self.size):
+                for value in range(self.size):
+                    self.add_choice(i, j, value)
+
+        # Clues are choices that are already made, so cover their constraints up front
+        for i in range(self.size):
+            for j in range(self.size):
+                if puzzle[i][j] == 'X':
+                    continue
+                value = self.symbols.index(puzzle[i][j])
+                node = self.find_choice(i, j, value)
+                for constraint in self.get_constraints(i, j, value):
+                    # If a constraint was already covered by another clue, puzzle will never be solved
+                    if self.right[self.left[constraint]] != constraint:
+                        raise ValueError('Puzzle is invalid and unsolvable!')
+                    self.cover(constraint)
+                self.solution.append(node)
+
+    # Column headers of the constraints covered by placing value (0-indexed) at (i, j)
+    def get_constraints(self, i: int, j: int, value: int) -> List[int]:
+        size = self.size
+        return [
+            1 + i * size + j,
+            1 + size * size + i * size + value,
+            1 + 2 * size * size + j * size + value,
+            1 + 3 * size * size + self.group_indexes[i][j] * size + value,
+        ]
+
+    # Append a matrix row for placing value (0-indexed) at (i, j)
+    def add_choice(self, i: int, j: int, value: int):
+        first = len(self.column)
+        constraints = self.get_constraints(i, j, value)
+        for k, constraint in enumerate(constraints):
+            node = first + k
+            self.left.append(first + (k - 1) % len(constraints))
+            self.right.append(first + (k + 1) % len(constraints))
+            # Link the node at the bottom of its column
+            self.up.append(self.up[constraint])
+            self.down.append(constraint)
+            self.down[self.up[constraint]] = node
+            self.up[constraint] = node
+            self.column.append(constraint)
+            self.choices.append((i, j, value))
+            self.sizes[constraint] += 1
+
+    # First node of the (i, j, value) matrix row. Choices are added in order, 4 nodes each, after the headers
+    def find_choice(self, i: int, j: int, value: int) -> int:
+        return self.columns + 1 + 4 * ((i * self.size + j) * self.size + value)
+
+    # Remove a column and every matrix row that covers it
+    def cover(self, header: int):
+        left, right, up, down, column, sizes = self.left, self.right, self.up, self.down, self.column, self.sizes
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        row = down[header]
+        while row != header:
+            node = right[row]
+            while node != row:
+                down[up[node]] = down[node]
+                up[down[node]] = up[node]
+                sizes[column[node]] -= 1
+                node = right[node]
+            row = down[row]
+
+    # Put back a column removed by cover, undoing its steps in reverse order
+    def uncover(self, header: int):
+        left, right, up, down, column, sizes = self.left, self.right, self.up, self.down, self.column, self.sizes
+        row = up[header]
+        while row != header:
+            node = left[row]
+            while node != row:
+                sizes[column[node]] += 1
+                down[up[node]] = node
+                up[down[node]] = node
+                node = left[node]
+            row = up[row]
+        right[left[header]] = header
+        left[right[header]] = header
+
+    # Yield every solution as a 2D matrix of value strings. The board is restored once the generator is exhausted
+    def iter_solutions(self) -> Iterator[List[List[str]]]:
+        left, right, down, sizes = self.left, self.right, self.down, self.sizes
+        self.threads += 1
+        if right[0] == 0:
+            yield self.get_puzzle()
+            return
+        # Branch on the constraint with the fewest choices left
+        header = right[0]
+        best = header
+        while header != 0:
+            if sizes[header] < sizes[best]:
+                best = header
+                if sizes[best] <= 1:
+                    break
+            header = right[header]
+        if sizes[best] == 0:
+            return
+
+        self.cover(best)
+        row = down[best]
+        while row != best:
+            self.solution.append(row)
+            node = right[row]
+            while node != row:
+                self.cover(self.column[node])
+                node = right[node]
+            yield from self.iter_solutions()
+            node = left[row]
+            while node != row:
+                self.uncover(self.column[node])
+                node = left[node]
+            self.solution.pop()
+            row = down[row]
+        self.uncover(best)
+
+    # Solve the puzzle and return the solution as a 2D matrix of value strings, or None if it is unsolvable
+    def solve(self) -> Optional[List[List[str]]]:
+        return next(self.iter_solutions(), None)
+
+    # Board of the choices made so far as a 2D matrix of value strings with 'X' for unfilled spaces
+    def get_puzzle(self) -> List[List[str]]:
+        puzzle = [['X'] * self.size for i in range(self.size)]
+        for node in self.solution:
+            i, j, value = self.choices[node]
+            puzzle[i][j] = self.symbols[value]
+        return puzzle
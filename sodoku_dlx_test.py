@@ -0,0 +1,111 @@
+import itertools
+import unittest
+import sodoku_board
+import sodoku_dlx
+import sodoku_solver
+
+class TestDLXSodokuMethods(unittest.TestCase):
+
+    exampleEasyPuzzle = [
+        ['1', 'X', '7', 'X', 'X', '6', 'X', 'X', 'X'],
+        ['X', 'X', '4', 'X', 'X', '9', '8', 'X', '7'],
+        ['X', '5', 'X', '2', 'X', 'X', 'X', 'X', '9'],
+        ['3', '7', '9', 'X', 'X', '5', '4', 'X', 'X'],
+        ['X', '8', 'X', '1', 'X', '7', 'X', '2', 'X'],
+        ['X', 'X', '1', '6', 'X', 'X', '7', '8', '5'],
+        ['6', 'X', 'X', 'X', 'X', '8', 'X', '9', 'X'],
+        ['9', 'X', '8', '4', 'X', 'X', '2', 'X', 'X'],
+        ['X', '4', 'X', '9', 'X', 'X', '1', 'X', '8'],
+    ]
+
+    exampleHardPuzzle = [
+        ['1', '2', '3', '4', '5', '6', '7', '8', '9'],
+        ['7', '8', '9', '1', '2', '3', '4', '5', '6'],
+        ['4', 'X', 'X', 'X', 'X', 'X', 'X', 'X', 'X'],
+        ['2', '3', '4', '5', '6', '7', '8', '9', '1'],
+        ['5', '6', '7', '8', '9', '1', '2', '3', '4'],
+        ['X', 'X', 'X', 'X', 'X', 'X', 'X', 'X', 'X'],
+        ['X', 'X', 'X', 'X', 'X', 'X', 'X', 'X', 'X'],
+        ['X', 'X', 'X', 'X', 'X', 'X', 'X', 'X', 'X'],
+        ['X', 'X', 'X', 'X', 'X', 'X', 'X', 'X', 'X'],
+    ]
+
+    exampleHardPuzzle2 = [
+        ['X', 'X', '6', 'X', 'X', '7', 'X', '4', '8'],
+        ['4', 'X', '8', 'X', 'X', 'X', 'X', '9', 'X'],
+        ['X', '9', 'X', '4', '8', 'X', 'X', 'X', '1'],
+        ['X', 'X', '5', 'X', '2', 'X', '3', 'X', 'X'],
+        ['X', 'X', 'X', '3', '5', '4', 'X', 'X', 'X'],
+        ['X', 'X', '3', 'X', '6', 'X', '7', 'X', 'X'],
+        ['6', 'X', 'X', 'X', '7', '5', 'X', '8', 'X'],
+        ['X', '8', 'X', 'X', 'X', 'X', '9', 'X', '5'],
+        ['9', '5', 'X', '8', 'X', 'X', '4', 'X', 'X'],
+    ]
+
+    exampleWrongPuzzle = [[str(i) for i in range(1, 10)] for j in range(1, 10)]
+
+    # 25x25 puzzle made from a shifted pattern solution with every third space left unfilled
+    exampleHugePuzzle = [['X' if (i + 2 * j) % 3 == 0 else sodoku_board.SYMBOLS[(5 * (i % 5) + i // 5 + j) % 25]
+                          for j in range(25)] for i in range(25)]
+
+    def assertValidSolution(self, puzzle, solution):
+        for i in range(9):
+            for j in range(9):
+                if puzzle[i][j] != 'X':
+                    self.assertEqual(solution[i][j], puzzle[i][j])
+        digits = {str(d) for d in range(1, 10)}
+        for i in range(9):
+            self.assertEqual(set(solution[i]), digits)
+            self.assertEqual({solution[j][i] for j in range(9)}, digits)
+            self.assertEqual({solution[i // 3 * 3 + j // 3][i % 3 * 3 + j % 3] for j in range(9)}, digits)
+
+    def test_init(self):
+        sodoku = sodoku_dlx.DLXSodoku(self.exampleEasyPuzzle)
+        self.assertEqual(sodoku.get_puzzle(), self.exampleEasyPuzzle)
+        self.assertEqual(sodoku.get_constraints(0, 0, 0), [1, 82, 163, 244])
+        self.assertEqual(sodoku.get_constraints(8, 8, 8), [81, 162, 243, 324])
+        with self.assertRaises(ValueError):
+            sodoku_dlx.DLXSodoku(self.exampleWrongPuzzle)
+
+    def test_cover_uncover(self):
+        sodoku = sodoku_dlx.DLXSodoku(self.exampleEasyPuzzle)
+        links = (sodoku.left[:], sodoku.right[:], sodoku.up[:], sodoku.down[:], sodoku.sizes[:])
+        header = sodoku.right[0]
+        sodoku.cover(header)
+        self.assertNotEqual(sodoku.right[0], header)
+        sodoku.uncover(header)
+        self.assertEqual((sodoku.left, sodoku.right, sodoku.up, sodoku.down, sodoku.sizes), links)
+
+    def test_solve(self):
+        for puzzle in [self.exampleEasyPuzzle, self.exampleHardPuzzle, self.exampleHardPuzzle2]:
+            self.assertValidSolution(puzzle, sodoku_dlx.DLXSodoku(puzzle).solve())
+        emptyPuzzle = [['X'] * 9 for i in range(9)]
+        self.assertValidSolution(emptyPuzzle, sodoku_dlx.DLXSodoku(emptyPuzzle).solve())
+
+    def test_iter_solutions(self):
+        self.assertEqual(len(list(sodoku_dlx.DLXSodoku(self.exampleHardPuzzle2).iter_solutions())), 1)
+        solutions = list(itertools.islice(sodoku_dlx.DLXSodoku(self.exampleHardPuzzle).iter_solutions(), 10))
+        self.assertEqual(len(solutions), 10)
+        self.assertEqual(len({str(solution) for solution in solutions}), 10)
+
+    def test_solve_dlx_backend(self):
+        sodoku = sodoku_solver.Sodoku(self.exampleHardPuzzle2)
+        sodoku.solve(backend='dlx')
+        self.assertTrue(sodoku.is_solved())
+        self.assertValidSolution(self.exampleHardPuzzle2, sodoku.set_values['puzzle'])
+
+    def test_other_sizes(self):
+        puzzle = sodoku_solver.puzzle_from_string('3.....3...23.3.4')
+        solution = sodoku_dlx.DLXSodoku(puzzle).solve()
+        self.assertEqual(solution[3], ['2', '3', '1', '4'])
+        for puzzle in [sodoku_solver.puzzle_from_string('.' * 256), self.exampleHugePuzzle]:
+            solution = sodoku_dlx.DLXSodoku(puzzle).solve()
+            symbols = set(sodoku_board.get_symbols(len(puzzle)))
+            for i in range(len(puzzle)):
+                self.assertEqual(set(solution[i]), symbols)
+                self.assertEqual({row[i] for row in solution}, symbols)
+                for j in range(len(puzzle)):
+                    self.assertIn(puzzle[i][j], ('X', solution[i][j]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from sodoku_bitmask import BitmaskSodoku
+from sodoku_board import BOX_SIZE, get_peer_table, get_symbols
+from sodoku_io import write_puzzles
+from sodoku_rules import RULES
+from sodoku_solver import Sodoku
+
+# Difficulties a puzzle can be rated, from easiest to hardest:
+#   easy: naked and hidden singles are enough
+#   medium: also needs pointing pairs or box-line reduction
+#   hard: also needs naked or hidden subsets or X-Wing
+#   expert: needs guessing
+DIFFICULTIES = ['easy', 'medium', 'hard', 'expert']
+# Difficulty of a puzzle that needs each propagation rule
+RULE_DIFFICULTIES = {rule: 'medium' if rule in ['pointing_pairs', 'box_line_reduction'] else 'hard' for rule in RULES}
+# Number of solved boards dug into before giving up on reaching a difficulty
+ATTEMPTS = 100
+
+
+# Generated puzzle with its only solution and its rated difficulty. index is the position of the puzzle in a
+# generate_many run
+class GeneratedPuzzle(NamedTuple):
+    index: int
+    puzzle: List[List[str]]
+    solution: List[List[str]]
+    difficulty: str
+
+
+# Rate a puzzle by the propagation rules and guesses the solver needs to solve it
+# Return the number of solutions (stopping at 2) and the difficulty, which is None unless there is exactly one solution
+def rate_puzzle(puzzle: List[List[str]]) -> Tuple[int, Optional[str]]:
+    sodoku = Sodoku(puzzle, rules=RULES)
+    try:
+        count = sodoku.count_solutions(limit=2)
+    except ValueError:
+        return 0, None
+    if count != 1:
+        return count, None
+    # A unique puzzle that needed more than the first decision path was guessed on
+    if sodoku.threads > 1:
+        return count, 'expert'
+    used = [RULE_DIFFICULTIES[rule] for rule, eliminations in sodoku.eliminations.items() if eliminations]
+    return count, max(used, key=DIFFICULTIES.index, default='easy')
+
+
+# Random solved board. The groups on the diagonal share no row or col, so they are filled with random permutations
+# and the search fills in the rest, then the values are relabeled at random
+def generate_solution(rng: random.Random, box_size: int = BOX_SIZE) -> List[List[str]]:
+    size = box_size * box_size
+    symbols = get_symbols(size)
+    solution = None
+    # Some 4x4 diagonals can not be finished, so those are drawn again
+    while solution is None:
+        puzzle = [['X'] * size for i in range(size)]
+        for group in range(box_size):
+            values = rng.sample(symbols, size)
+            for k, value in enumerate(values):
+                puzzle[group * box_size + k // box_size][group * box_size + k % box_size] = value
+        solution = BitmaskSodoku(puzzle).solve()
+    relabel = dict(zip(symbols, rng.sample(symbols, size)))
+    return [[relabel[value] for value in row] for row in solution]
+
+
+# Generate one puzzle with a single solution at the given difficulty
+# Clues are removed from a random solved board in random order, as long as the puzzle keeps one solution and does not
+# get harder than difficulty. If the result is too easy, start over with another board
+def generate(difficulty: str = 'medium', rng: Optional[random.Random] = None,
+             box_size: int = BOX_SIZE) -> Tuple[List[List[str]], List[List[str]]]:
+    if difficulty not in DIFFICULTIES:
+        raise ValueError('Unknown difficulty', difficulty)
+    rng = rng or random.Random()
+    target = DIFFICULTIES.index(difficulty)
+    size = box_size * box_size
+    peers = get_peer_table(box_size)
+    for attempt in range(ATTEMPTS):
+        solution = generate_solution(rng, box_size)
+        puzzle = [row[:] for row in solution]
+        rating = 'easy'
+        spaces = [(i, j) for i in range(size) for j in range(size)]
+        rng.shuffle(spaces)
+        for i, j in spaces:
+            value = puzzle[i][j]
+            puzzle[i][j] = 'X'
+            # A space whose peers hold every other value is a naked single, which is filled right away, so the
+            # puzzle keeps one solution and its rating without solving it again
+            if len({puzzle[k][l] for k, l in peers[i][j]} - {'X'}) == size - 1:
+                continue
+            count, new_rating = rate_puzzle(puzzle)
+            if count != 1 or DIFFICULTIES.index(new_rating) > target:
+                puzzle[i][j] = value
+            else:
+                rating = new_rating
+        if rating == difficulty:
+            return puzzle, solution
+    raise ValueError('Could not generate a puzzle of difficulty {} in {} attempts'.format(difficulty, ATTEMPTS))
+
+
+# Generate the puzzle of one (index, difficulty, seed, box_size) job. Every job seeds its own generator from the run
+# seed and its index, so a run gives the same puzzles however the jobs are split between processes
+def generate_job(job: Tuple[int, str, int, int]) -> GeneratedPuzzle:
+    index, difficulty, seed, box_size = job
+    rng = random.Random('{}:{}'.format(seed, index))
+    puzzle, solution = generate(difficulty, rng, box_size)
+    return GeneratedPuzzle(index, puzzle, solution, difficulty)
+
+
+# Generate count puzzles of the given difficulty across a pool of worker processes, yielding them in order
+# workers is the number of processes (all cores if None, no pool if 1). The same seed always gives the same puzzles;
+# a random seed is picked if it is None
+def generate_many(count: int, difficulty: str = 'medium', seed: Optional[int] = None, workers: Optional[int] = None,
+                  chunksize: int = 1, box_size: int = BOX_SIZE) -> Iterator[GeneratedPuzzle]:
+    if difficulty not in DIFFICULTIES:
+        raise ValueError('Unknown difficulty', difficulty)
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    jobs = ((index, difficulty, seed, box_size) for index in range(count))
+    if workers == 1:
+        yield from map(generate_job, jobs)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap(generate_job, jobs, chunksize)
+
+
+# Write generated puzzles one per line, then how fast they were generated to stderr
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Generate sodoku puzzles with one solution, one puzzle per line')
+    parser.add_argument('count', type=int, help='number of puzzles to generate')
+    parser.add_argument('--difficulty', default='medium', choices=DIFFICULTIES)
+    parser.add_argument('--seed', type=int, default=None, help='seed to generate the same puzzles again')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--chunksize', type=int, default=1, help='puzzles generated by a worker at a time')
+    parser.add_argument('--box-size', type=int, default=BOX_SIZE, help='group width, like 4 for 16x16 (default: 3)')
+    parser.add_argument('--output', type=argparse.FileType('w'), default=sys.stdout,
+                        help='file to write puzzles to (default: stdout)')
+    args = parser.parse_args(argv)
+
+    start_time = time.perf_counter()
+    generated = generate_many(args.count, args.difficulty, args.seed, args.workers, args.chunksize, args.box_size)
+    count = write_puzzles(args.output, (result.puzzle for result in generated))
+    args.output.flush()
+    seconds = time.perf_counter() - start_time
+    print('{} puzzles in {:.2f} seconds ({:.1f} puzzles/sec)'.format(count, seconds, count / max(seconds, 1e-9)),
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
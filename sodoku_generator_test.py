@@ -0,0 +1,73 @@
+import io
+import random
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+import sodoku_generator
+import sodoku_solver
+
+class TestSodokuGeneratorMethods(unittest.TestCase):
+
+    exampleEasyPuzzle = '1X7XX6XXXXX4XX98X7X5X2XXXX9379XX54XXX8X1X7X2XXX16XX7856XXXX8X9X9X84XX2XXX4X9XX1X8'
+    exampleMediumPuzzle = '4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......'
+    exampleExpertPuzzle = 'XX6XX7X484X8XXXX9XX9X48XXX1XX5X2X3XXXXX354XXXXX3X6X7XX6XXX75X8XX8XXXX9X595X8XX4XX'
+    exampleHardPuzzle = '1234567897891234564XXXXXXXX234567891567891234XXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXX'
+    exampleWrongPuzzle = '123456789' * 9
+
+    def assertGenerated(self, puzzle, solution, difficulty):
+        self.assertTrue(sodoku_solver.Sodoku([list(row) for row in solution]).is_solved())
+        for i in range(len(puzzle)):
+            for j in range(len(puzzle)):
+                self.assertIn(puzzle[i][j], ['X', solution[i][j]])
+        self.assertEqual(sodoku_generator.rate_puzzle(puzzle), (1, difficulty))
+
+    def test_rate_puzzle(self):
+        self.assertEqual(sodoku_generator.rate_puzzle(sodoku_solver.puzzle_from_string(self.exampleEasyPuzzle)),
+                         (1, 'easy'))
+        self.assertEqual(sodoku_generator.rate_puzzle(sodoku_solver.puzzle_from_string(self.exampleMediumPuzzle)),
+                         (1, 'medium'))
+        self.assertEqual(sodoku_generator.rate_puzzle(sodoku_solver.puzzle_from_string(self.exampleExpertPuzzle)),
+                         (1, 'expert'))
+        self.assertEqual(sodoku_generator.rate_puzzle(sodoku_solver.puzzle_from_string(self.exampleHardPuzzle)),
+                         (2, None))
+        self.assertEqual(sodoku_generator.rate_puzzle(sodoku_solver.puzzle_from_string(self.exampleWrongPuzzle)),
+                         (0, None))
+
+    def test_generate_solution(self):
+        solution = sodoku_generator.generate_solution(random.Random(1))
+        self.assertTrue(sodoku_solver.Sodoku(solution).is_solved())
+        self.assertEqual(solution, sodoku_generator.generate_solution(random.Random(1)))
+        self.assertNotEqual(solution, sodoku_generator.generate_solution(random.Random(2)))
+        solution = sodoku_generator.generate_solution(random.Random(1), box_size=4)
+        self.assertTrue(sodoku_solver.Sodoku(solution).is_solved())
+
+    def test_generate(self):
+        for difficulty in ['easy', 'medium']:
+            puzzle, solution = sodoku_generator.generate(difficulty, random.Random(3))
+            self.assertGenerated(puzzle, solution, difficulty)
+        puzzle, solution = sodoku_generator.generate('easy', random.Random(3), box_size=2)
+        self.assertGenerated(puzzle, solution, 'easy')
+        with self.assertRaises(ValueError):
+            sodoku_generator.generate('unknown')
+
+    def test_generate_many(self):
+        generated = list(sodoku_generator.generate_many(3, 'easy', seed=7, workers=1))
+        self.assertEqual([result.index for result in generated], [0, 1, 2])
+        for result in generated:
+            self.assertGenerated(result.puzzle, result.solution, 'easy')
+        # Puzzles only depend on the seed, not on how they are split between processes
+        self.assertEqual(list(sodoku_generator.generate_many(3, 'easy', seed=7, workers=2, chunksize=2)), generated)
+        self.assertNotEqual(list(sodoku_generator.generate_many(3, 'easy', seed=8, workers=1)), generated)
+
+    def test_main(self):
+        with tempfile.NamedTemporaryFile('r', suffix='.sdm') as output_file:
+            with redirect_stderr(io.StringIO()) as stderr:
+                sodoku_generator.main(['2', '--difficulty', 'easy', '--seed', '1', '--workers', '1',
+                                       '--output', output_file.name])
+            lines = output_file.read().splitlines()
+        self.assertIn('2 puzzles', stderr.getvalue())
+        self.assertEqual(lines, [sodoku_solver.puzzle_to_string(result.puzzle)
+                                 for result in sodoku_generator.generate_many(2, 'easy', seed=1, workers=1)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import re
+from typing import Iterable, Iterator, List, TextIO, Union
+
+from sodoku_board import get_box_size, get_symbols
+from sodoku_solver import SIZE, puzzle_from_string, puzzle_to_string
+
+
+# Lazily parse puzzles from lines of text, one puzzle at a time, so files of any size can be streamed.
+# Two layouts are understood and can be mixed in one file:
+#   - one puzzle per line of size * size characters, row after row (.sdm collections)
+#   - one puzzle per size lines of size characters (.sdk style grids), where spaces and | are ignored and lines of
+#     only - and + separate groups
+# X, ., and 0 are unfilled spaces. Blank lines, lines starting with # and header lines between grids (like "Grid 01",
+# lines that are not mostly puzzle characters) are skipped. size is the number of rows of the puzzles, 16 for 16x16
+# puzzles. Any other line is a puzzle line, and raises ValueError if it is not a valid puzzle. With keep_invalid, bad
+# puzzle lines are yielded as they are (as strings) instead, so a stream keeps one entry per puzzle line. The rows of a
+# grid that is cut short are yielded joined as one string
+def read_puzzles(lines: Iterable[str], size: int = SIZE,
+                 keep_invalid: bool = False) -> Iterator[Union[List[List[str]], str]]:
+    # Raise ValueError early for sizes no sodoku has
+    get_box_size(size)
+    alphabet = set(get_symbols(size) + 'X.0')
+    row_pattern = re.compile('[{}X.0]+'.format(get_symbols(size)))
+    rows = []
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#') or re.fullmatch(r'[-+]+', line):
+            continue
+        line = re.sub(r'[ |]', '', line)
+        if len(line) == size and row_pattern.fullmatch(line):
+            rows.append(line)
+            if len(rows) == size:
+                yield puzzle_from_string(''.join(rows))
+                rows = []
+            continue
+        if rows:
+            if not keep_invalid:
+                raise ValueError('Puzzle grid is cut short on line {}'.format(line_number), line)
+            # The rows (maybe a cut short puzzle line that happened to be as long as a row) are one bad entry, and
+            # this line is read as usual
+            yield ''.join(rows)
+            rows = []
+        if sum(char in alphabet for char in line) * 2 <= len(line):
+            continue
+        try:
+            if len(line) != size * size:
+                raise ValueError('A puzzle line must have {} characters in it!'.format(size * size), line)
+            yield puzzle_from_string(line)
+        except ValueError as error:
+            if not keep_invalid:
+                raise ValueError('Invalid puzzle on line {}'.format(line_number), line) from error
+            yield line
+    if rows:
+        if not keep_invalid:
+            raise ValueError('Puzzle grid is cut short at the end of the input')
+        yield ''.join(rows)
+
+
+# Write puzzles one per line as they come, so the puzzles never all need to be in memory
+# Return the number of puzzles written
+def write_puzzles(file: TextIO, puzzles: Iterable[List[List[str]]]) -> int:
+    count = 0
+    for puzzle in puzzles:
+        file.write(puzzle_to_string(puzzle) + '\n')
+        count += 1
+    return count
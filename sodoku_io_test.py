@@ -0,0 +1,89 @@
+import io
+import unittest
+import sodoku_io
+
+class TestSodokuIOMethods(unittest.TestCase):
+
+    exampleEasyPuzzle = '1X7XX6XXXXX4XX98X7X5X2XXXX9379XX54XXX8X1X7X2XXX16XX7856XXXX8X9X9X84XX2XXX4X9XX1X8'
+    exampleEasyGrid = '''Grid 01
+1.7|..6|...
+..4|..9|8.7
+.5.|2..|..9
+---+---+---
+379|..5|4..
+.8.|1.7|.2.
+..1|6..|785
+---+---+---
+6..|..8|.9.
+9.8|4..|2..
+.4.|9..|1.8
+'''
+    exampleHardPuzzle2 = '006007048408000090090480001005020300000354000003060700600075080080000905950800400'
+
+    def test_read_puzzles(self):
+        lines = io.StringIO('# comment\n\n' + self.exampleHardPuzzle2 + '\n' + self.exampleEasyGrid + '\n'
+                            + self.exampleEasyPuzzle + '\n')
+        puzzles = list(sodoku_io.read_puzzles(lines))
+        self.assertEqual(len(puzzles), 3)
+        self.assertEqual(puzzles[0][0], ['X', 'X', '6', 'X', 'X', '7', 'X', '4', '8'])
+        self.assertEqual(puzzles[1], puzzles[2])
+        self.assertEqual(puzzles[1][8], ['X', '4', 'X', '9', 'X', 'X', '1', 'X', '8'])
+
+    def test_read_puzzles_is_lazy(self):
+        def lines():
+            yield self.exampleEasyPuzzle
+            raise AssertionError('Only the first line should be read')
+
+        puzzles = sodoku_io.read_puzzles(lines())
+        self.assertEqual(next(puzzles)[0][0], '1')
+
+    def test_read_puzzles_invalid(self):
+        with self.assertRaises(ValueError):
+            list(sodoku_io.read_puzzles(io.StringIO(self.exampleEasyGrid.replace('9.8|4..|2..\n', ''))))
+        with self.assertRaises(ValueError):
+            list(sodoku_io.read_puzzles(io.StringIO('\n'.join(self.exampleEasyGrid.splitlines()[:4]))))
+        with self.assertRaises(ValueError):
+            list(sodoku_io.read_puzzles(io.StringIO(self.exampleEasyPuzzle[:-1] + 'a')))
+
+    def test_read_puzzles_bad_lines(self):
+        # A cut short line is a bad puzzle, not a header to skip
+        with self.assertRaises(ValueError):
+            list(sodoku_io.read_puzzles(io.StringIO(self.exampleEasyPuzzle + '\n' + self.exampleEasyPuzzle[:-1])))
+        badLines = [self.exampleEasyPuzzle[:-1], self.exampleEasyPuzzle[:-1] + 'a', self.exampleEasyPuzzle + '1']
+        lines = io.StringIO('Puzzles\n' + '\n'.join([self.exampleEasyPuzzle] + badLines + [self.exampleHardPuzzle2]))
+        puzzles = list(sodoku_io.read_puzzles(lines, keep_invalid=True))
+        # Bad lines keep their place, so there is one entry per puzzle line
+        self.assertEqual(puzzles[1:4], badLines)
+        self.assertEqual(len(puzzles), 5)
+        self.assertEqual(puzzles[4][0][2], '6')
+
+    def test_read_puzzles_cut_short_grids(self):
+        # A cut short puzzle line as long as a row starts a grid that the next line cuts short
+        lines = [self.exampleEasyPuzzle, self.exampleEasyPuzzle[:9], self.exampleHardPuzzle2, self.exampleEasyPuzzle[:9]]
+        with self.assertRaises(ValueError):
+            list(sodoku_io.read_puzzles(io.StringIO('\n'.join(lines))))
+        puzzles = list(sodoku_io.read_puzzles(io.StringIO('\n'.join(lines)), keep_invalid=True))
+        # The rows read so far are one bad entry, and the line that cut them short is read as usual
+        self.assertEqual(len(puzzles), 4)
+        self.assertEqual(puzzles[1], self.exampleEasyPuzzle[:9])
+        self.assertEqual(puzzles[2][0][2], '6')
+        self.assertEqual(puzzles[3], self.exampleEasyPuzzle[:9])
+
+    def test_read_puzzles_other_sizes(self):
+        grid = '3.|..\n..|3.\n--+--\n..|23\n.3|.4\n'
+        puzzles = list(sodoku_io.read_puzzles(io.StringIO(grid + '3.....3...23.3.4\n'), size=4))
+        self.assertEqual(len(puzzles), 2)
+        self.assertEqual(puzzles[0], puzzles[1])
+        puzzles = list(sodoku_io.read_puzzles(io.StringIO('G' + '.' * 255), size=16))
+        self.assertEqual(puzzles[0][0][:2], ['G', 'X'])
+        with self.assertRaises(ValueError):
+            list(sodoku_io.read_puzzles(io.StringIO(self.exampleEasyPuzzle), size=8))
+
+    def test_write_puzzles(self):
+        output = io.StringIO()
+        puzzles = sodoku_io.read_puzzles(io.StringIO(self.exampleEasyGrid + self.exampleEasyPuzzle))
+        self.assertEqual(sodoku_io.write_puzzles(output, puzzles), 2)
+        self.assertEqual(output.getvalue(), (self.exampleEasyPuzzle + '\n') * 2)
+
+if __name__ == '__main__':
+    unittest.main()
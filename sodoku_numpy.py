@@ -0,0 +1,152 @@
+# Vectorized batch solving. Needs numpy, which the rest of the solver does not
+import itertools
+import time
+from typing import Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from sodoku_batch import INVALID, SOLVED, UNSOLVABLE, BatchResult
+from sodoku_bitmask import BitmaskSodoku
+from sodoku_solver import SIZE
+
+# Bitmask with one bit set for every digit 1-9. Bit (d - 1) represents digit d
+ALL_DIGITS = (1 << SIZE) - 1
+# Bit of every digit, used to split masks into one boolean plane per digit
+BITS = (1 << np.arange(SIZE)).astype(np.uint16)
+# Number of digits in every mask
+BIT_COUNTS = np.array([bin(mask).count('1') for mask in range(ALL_DIGITS + 1)], dtype=np.uint8)
+
+
+# Turn 2D matrix puzzles into an (N, 9, 9) uint16 array holding the placed digit bit of every space, 0 if unfilled
+# Only 9x9 puzzles can be swept, bigger ones need the Sodoku search. Bad puzzle lines kept by read_puzzles (strings)
+# are left empty, solve_batch marks them invalid
+def puzzles_to_array(puzzles: List[List[List[str]]]) -> np.ndarray:
+    boards = np.zeros((len(puzzles), SIZE, SIZE), dtype=np.uint16)
+    for n, puzzle in enumerate(puzzles):
+        if isinstance(puzzle, str):
+            continue
+        if len(puzzle) != SIZE or any(len(row) != SIZE for row in puzzle):
+            raise ValueError('Vectorized solving only supports {0}x{0} puzzles'.format(SIZE))
+        for i in range(SIZE):
+            for j in range(SIZE):
+                if puzzle[i][j] != 'X':
+                    boards[n, i, j] = 1 << (int(puzzle[i][j]) - 1)
+    return boards
+
+
+# Turn one (9, 9) board of digit bits back into a 2D matrix of digit strings with 'X' for unfilled spaces
+def array_to_puzzle(board: np.ndarray) -> List[List[str]]:
+    return [[str(int(bit).bit_length()) if bit else 'X' for bit in row] for row in board]
+
+
+# Expand an (N, 3, 3, ...) per-group array to (N, 9, 9, ...) so every space sees the value of its group
+def expand_groups(groups: np.ndarray) -> np.ndarray:
+    return np.repeat(np.repeat(groups, 3, axis=1), 3, axis=2)
+
+
+# Mask of digits that can still be placed in every unfilled space of every board (0 for filled spaces)
+def get_candidates(boards: np.ndarray) -> np.ndarray:
+    count = len(boards)
+    rows = np.bitwise_or.reduce(boards, axis=2)
+    cols = np.bitwise_or.reduce(boards, axis=1)
+    groups = np.bitwise_or.reduce(boards.reshape(count, 3, 3, 3, 3), axis=(2, 4))
+    used = rows[:, :, None] | cols[:, None, :] | expand_groups(groups)
+    return np.where(boards == 0, ~used & ALL_DIGITS, 0).astype(np.uint16)
+
+
+# Count how many times every digit shows up in each row, col, and group, spread back over the spaces
+# planes is an (N, 9, 9, 9) boolean array of digit d present at space (i, j). Returns three (N, 9, 9, 9) arrays
+def count_per_constraint(planes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    count = len(planes)
+    rows = planes.sum(axis=2, dtype=np.uint8)[:, :, None, :]
+    cols = planes.sum(axis=1, dtype=np.uint8)[:, None, :, :]
+    groups = expand_groups(planes.reshape(count, 3, 3, 3, 3, SIZE).sum(axis=(2, 4), dtype=np.uint8))
+    return (np.broadcast_to(rows, planes.shape), np.broadcast_to(cols, planes.shape),
+            np.broadcast_to(groups, planes.shape))
+
+
+# Boards where a digit is placed more than once in a row, col, or group. Every space holds at most one digit bit, so a
+# constraint has a duplicate if it has more filled spaces than digits in the or of its spaces
+def find_duplicates(boards: np.ndarray) -> np.ndarray:
+    count = len(boards)
+    groups = boards.reshape(count, 3, 3, 3, 3).transpose(0, 1, 3, 2, 4).reshape(count, SIZE, SIZE)
+    duplicates = np.zeros(count, dtype=bool)
+    for units in (boards, boards.transpose(0, 2, 1), groups):
+        filled = (units != 0).sum(axis=2)
+        duplicates |= (filled > BIT_COUNTS[np.bitwise_or.reduce(units, axis=2)]).any(axis=1)
+    return duplicates
+
+
+# Place every naked and hidden single of every board at once
+# Return the updated boards, which boards changed, and which boards can never be solved
+def sweep(boards: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    empty = boards == 0
+    candidates = get_candidates(boards)
+    # An unfilled space with no possible values
+    unsolvable = (empty & (candidates == 0)).any(axis=(1, 2))
+
+    # If any space has only 1 possible value, then that space must have that possible value as the answer
+    naked = empty & (candidates != 0) & ((candidates & (candidates - 1)) == 0)
+    # If any constraint has only 1 spot a possible value can be placed, then the value can only be placed there
+    planes = (candidates[..., None] & BITS) != 0
+    hidden = np.zeros_like(planes)
+    for counts in count_per_constraint(planes):
+        hidden |= planes & (counts == 1)
+    hidden_bits = np.bitwise_or.reduce(np.where(hidden, BITS, 0).astype(np.uint16), axis=3)
+
+    placements = np.where(naked, candidates, hidden_bits).astype(np.uint16)
+    # A space that is the only spot for two different values
+    conflicts = (placements & (placements - 1)) != 0
+    unsolvable |= conflicts.any(axis=(1, 2))
+    place = empty & (placements != 0) & ~conflicts & ~unsolvable[:, None, None]
+    placed = np.where(place, placements, 0).astype(np.uint16)
+    # Singles are candidates, so they never clash with digits already on the board, only with each other
+    unsolvable |= find_duplicates(placed)
+    boards = boards | placed
+    return boards, place.any(axis=(1, 2)) & ~unsolvable, unsolvable
+
+
+# Solve one batch of puzzles: vectorized sweeps first, then the bitmask search for boards the sweeps could not finish
+def solve_batch(puzzles: List[List[List[str]]], first_index: int = 0) -> List[BatchResult]:
+    start_time = time.perf_counter()
+    boards = puzzles_to_array(puzzles)
+    statuses = [None] * len(puzzles)
+    invalid = find_duplicates(boards) | np.array([isinstance(puzzle, str) for puzzle in puzzles], dtype=bool)
+    for n in np.flatnonzero(invalid):
+        statuses[n] = INVALID
+
+    # Only sweep the boards that still change
+    active = np.flatnonzero(~invalid)
+    while len(active):
+        boards[active], changed, unsolvable = sweep(boards[active])
+        for n in active[unsolvable]:
+            statuses[n] = UNSOLVABLE
+        active = active[changed]
+    # Vectorized time is shared evenly between the boards of the batch
+    sweep_seconds = (time.perf_counter() - start_time) / max(len(puzzles), 1)
+
+    results = []
+    for n, puzzle in enumerate(puzzles):
+        solution = None
+        fallback_time = time.perf_counter()
+        if statuses[n] is None and boards[n].all():
+            statuses[n] = SOLVED
+            solution = array_to_puzzle(boards[n])
+        elif statuses[n] is None:
+            # Stalled: search the rest of the board with the bitmask engine
+            solution = BitmaskSodoku(array_to_puzzle(boards[n])).solve()
+            statuses[n] = SOLVED if solution is not None else UNSOLVABLE
+        seconds = sweep_seconds + time.perf_counter() - fallback_time
+        results.append(BatchResult(first_index + n, solution, statuses[n], seconds))
+    return results
+
+
+# Solve many 2D matrix puzzles, batch_size boards at a time, yielding results in input order.
+# puzzles are read lazily, so this can be fed straight from sodoku_io.read_puzzles
+def solve_vectorized(puzzles: Iterable[List[List[str]]], batch_size: int = 4096) -> Iterator[BatchResult]:
+    puzzles = iter(puzzles)
+    for first_index in itertools.count(0, batch_size):
+        batch = list(itertools.islice(puzzles, batch_size))
+        if not batch:
+            return
+        yield from solve_batch(batch, first_index)
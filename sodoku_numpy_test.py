@@ -0,0 +1,83 @@
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+import sodoku_batch
+import sodoku_solver
+
+try:
+    import numpy
+    import sodoku_numpy
+except ImportError:
+    numpy = None
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestSodokuNumpyMethods(unittest.TestCase):
+
+    exampleEasyPuzzle = '1X7XX6XXXXX4XX98X7X5X2XXXX9379XX54XXX8X1X7X2XXX16XX7856XXXX8X9X9X84XX2XXX4X9XX1X8'
+    exampleMediumPuzzle = '9XX4XXX357XXXXXXX9X4XX59XXXXXX92XXX369X8X5X243XXX17XXXXXX76XX4X4XXXXXXX258XXX3XX6'
+    exampleHardPuzzle = '1234567897891234564XXXXXXXX234567891567891234XXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXX'
+    exampleHardPuzzle2 = 'XX6XX7X484X8XXXX9XX9X48XXX1XX5X2X3XXXXX354XXXXX3X6X7XX6XXX75X8XX8XXXX9X595X8XX4XX'
+    exampleWrongPuzzle = '123456789' * 9
+    # (0, 8) can only be a 9, but there is already a 9 in its col
+    exampleUnsolvablePuzzle = '12345678X' + 'XXXXXXXX9' + 'X' * 63
+
+    def setUp(self):
+        self.puzzles = [sodoku_solver.puzzle_from_string(puzzle) for puzzle in [
+            self.exampleEasyPuzzle, self.exampleMediumPuzzle, self.exampleHardPuzzle, self.exampleHardPuzzle2,
+            self.exampleWrongPuzzle, self.exampleUnsolvablePuzzle]]
+
+    def test_puzzles_to_array(self):
+        boards = sodoku_numpy.puzzles_to_array(self.puzzles[:1])
+        self.assertEqual(boards.shape, (1, 9, 9))
+        self.assertEqual(boards[0, 0, 0], 1)
+        self.assertEqual(boards[0, 0, 2], 1 << 6)
+        self.assertEqual(boards[0, 0, 1], 0)
+        self.assertEqual(sodoku_numpy.array_to_puzzle(boards[0]), self.puzzles[0])
+
+    def test_puzzles_to_array_other_sizes(self):
+        with self.assertRaises(ValueError):
+            sodoku_numpy.puzzles_to_array([[['X'] * 16 for i in range(16)]])
+
+    def test_get_candidates(self):
+        candidates = sodoku_numpy.get_candidates(sodoku_numpy.puzzles_to_array(self.puzzles[1:2]))
+        # (0, 1) can be a 1, 2, or 6
+        self.assertEqual(candidates[0, 0, 1], 0b000100011)
+        self.assertEqual(candidates[0, 0, 0], 0)
+
+    def test_find_duplicates(self):
+        boards = sodoku_numpy.puzzles_to_array(self.puzzles)
+        self.assertEqual(list(sodoku_numpy.find_duplicates(boards)), [False] * 4 + [True, False])
+
+    def test_sweep(self):
+        boards = sodoku_numpy.puzzles_to_array(self.puzzles[:1])
+        swept, changed, unsolvable = sodoku_numpy.sweep(boards)
+        self.assertTrue(changed[0])
+        self.assertFalse(unsolvable[0])
+        self.assertGreater((swept != 0).sum(), (boards != 0).sum())
+
+    def test_solve_vectorized(self):
+        results = list(sodoku_numpy.solve_vectorized(self.puzzles, batch_size=4))
+        self.assertEqual([result.index for result in results], list(range(6)))
+        self.assertEqual([result.status for result in results],
+                         ['solved', 'solved', 'solved', 'solved', 'invalid', 'unsolvable'])
+        for result, puzzle in zip(results[:4], self.puzzles):
+            self.assertTrue(sodoku_solver.Sodoku(result.solution).is_solved())
+            for i in range(9):
+                for j in range(9):
+                    if puzzle[i][j] != 'X':
+                        self.assertEqual(result.solution[i][j], puzzle[i][j])
+
+    def test_batch_main_vectorized(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.sdm') as input_file:
+            input_file.write('\n'.join([self.exampleHardPuzzle2, self.exampleWrongPuzzle]) + '\n')
+            input_file.flush()
+            output = io.StringIO()
+            with redirect_stdout(output):
+                sodoku_batch.main([input_file.name, '--vectorized'])
+        lines = [line.split() for line in output.getvalue().splitlines()]
+        self.assertEqual([line[1] for line in lines], ['solved', 'invalid'])
+        self.assertEqual(lines[1][0], self.exampleWrongPuzzle)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import argparse
+import collections
+import concurrent.futures
+import multiprocessing
+import os
+import time
+from typing import List, Optional, Tuple, Union
+
+from sodoku_solver import (NODE_LIMIT, SOLVED, TIMED_OUT, UNSOLVABLE, CancellationToken, PuzzleResult,
+                           Sodoku, puzzle_from_string, puzzle_to_string)
+from sodoku_stats import SolverStats
+
+# Subproblems handed out per worker before searching starts, so a worker that finishes early has more to take
+SUBPROBLEMS_PER_WORKER = 4
+# Decision paths a worker searches a subproblem for before it gives up and splits it again. Every split doubles the
+# budget of the pieces, so deep subtrees are not split forever
+NODE_BUDGET = 2000
+
+# Token of the worker processes of a solve_parallel call, set by its pool initializer
+worker_cancel = None
+
+
+# Pool initializer: every worker stops its search as soon as event is set
+def init_worker(event):
+    global worker_cancel
+    worker_cancel = CancellationToken(event)
+
+
+# Make the first decision of a board: fill trivial spaces, then place every possible value of the space picked by the
+# space heuristic and fill trivial spaces again
+# Return the solution if one is found on the way (else None), the boards left to search as one line strings, and the
+# stats of the work done
+def expand(board: str, options: dict) -> Tuple[Optional[List[List[str]]], List[str], SolverStats]:
+    sodoku = Sodoku(board, **options)
+    sodoku.init_set_values()
+    sodoku.update_possible_values()
+    try:
+        if sodoku.visit_decision_path():
+            return sodoku.set_values['puzzle'], [], sodoku.stats
+    except ValueError:
+        return None, [], sodoku.stats
+    i, j, guesses, state, _ = sodoku.make_decision()
+    boards = []
+    # Guesses are stored in reverse order
+    for guess in reversed(guesses):
+        sodoku.restore_state(state)
+        try:
+            sodoku.place_values([(i, j, guess)])
+            if sodoku.visit_decision_path():
+                return sodoku.set_values['puzzle'], [], sodoku.stats
+        except ValueError:
+            continue
+        boards.append(puzzle_to_string(sodoku.set_values['puzzle']))
+    return None, boards, sodoku.stats
+
+
+# Expand the top of the decision tree breadth first until there are at least count boards to search
+# Return the solution if one is found on the way (else None), the boards, and the stats of the work done. There are no
+# boards left if the puzzle is solved or unsolvable
+def split(board: str, count: int, options: dict) -> Tuple[Optional[List[List[str]]], List[str], SolverStats]:
+    stats = SolverStats(options.get('rules', ()))
+    boards = collections.deque([board])
+    while boards and len(boards) < count:
+        solution, children, expand_stats = expand(boards.popleft(), options)
+        stats.merge(expand_stats)
+        if solution is not None:
+            return solution, [], stats
+        boards.extend(children)
+    return None, list(boards), stats
+
+
+# Search one (board, node budget, Sodoku options, seconds left) subproblem in a worker process
+# Return the status, the solution if it is solved, the stats of the search, and the boards it was split into if the
+# budget ran out before the subtree was searched
+def search_subproblem(job: Tuple[str, int, dict, Optional[float]]):
+    board, budget, options, timeout = job
+    sodoku = Sodoku(board, **options)
+    status, solution, stats = sodoku.find_solution(timeout=timeout, max_nodes=budget, cancel=worker_cancel)
+    boards = []
+    if status == NODE_LIMIT:
+        solution, boards, split_stats = expand(board, options)
+        stats.merge(split_stats)
+        if solution is not None:
+            status = SOLVED
+    return status, solution if status == SOLVED else None, stats, boards
+
+
+# Solve one hard puzzle on many cores. The top of the decision tree is split into subproblems that worker processes
+# search independently. A subproblem that is not done within its node budget is split again and its pieces queued,
+# so uneven subtrees are spread over the workers. As soon as one worker finds a solution the others are cancelled, so
+# for puzzles with many solutions the one returned can differ between runs.
+# puzzle, options, and the result are as in solve_puzzle. workers is the number of processes (all cores if None) and
+# timeout the seconds to search for. node_budget is the node budget subproblems start with
+# Raise ValueError if the puzzle is invalid
+def solve_parallel(puzzle: Union[str, bytes, List[List[str]]], workers: Optional[int] = None,
+                   timeout: Optional[float] = None, node_budget: int = NODE_BUDGET, **options) -> PuzzleResult:
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    sodoku = Sodoku(puzzle, **options)
+    # Raise ValueError for invalid puzzles before starting any process
+    sodoku.init_set_values()
+    board = puzzle_to_string(sodoku.set_values['puzzle'])
+    stats = SolverStats(sodoku.rules)
+    workers = workers or os.cpu_count() or 1
+
+    solution, boards, split_stats = split(board, workers * SUBPROBLEMS_PER_WORKER, options)
+    stats.merge(split_stats)
+    status = SOLVED if solution is not None else UNSOLVABLE
+    pending = collections.deque((board, node_budget) for board in boards)
+    if pending:
+        context = multiprocessing.get_context()
+        event = context.Event()
+        executor = concurrent.futures.ProcessPoolExecutor(workers, context, init_worker, (event,))
+        running = {}
+        try:
+            while pending or running:
+                seconds_left = None if deadline is None else deadline - time.perf_counter()
+                if seconds_left is not None and seconds_left <= 0:
+                    status = TIMED_OUT
+                    break
+                # Keep one subproblem per worker in flight, so split pieces are picked up before older subproblems
+                while pending and len(running) < workers:
+                    board, budget = pending.popleft()
+                    future = executor.submit(search_subproblem, (board, budget, options, seconds_left))
+                    running[future] = budget
+                done, _ = concurrent.futures.wait(running, seconds_left, concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    budget = running.pop(future)
+                    subproblem_status, subproblem_solution, subproblem_stats, boards = future.result()
+                    stats.merge(subproblem_stats)
+                    if subproblem_status == SOLVED and solution is None:
+                        solution = subproblem_solution
+                    elif subproblem_status == TIMED_OUT:
+                        status = TIMED_OUT
+                    # Pieces of a split go to the front, so a big subtree is finished before new ones are started
+                    pending.extendleft((board, budget * 2) for board in reversed(boards))
+                if solution is not None:
+                    status = SOLVED
+                    break
+                if status == TIMED_OUT:
+                    break
+        finally:
+            # First solution cancellation: running workers stop on their next decision path
+            event.set()
+            executor.shutdown(cancel_futures=True)
+
+    if status == SOLVED:
+        grid = solution
+    else:
+        grid = sodoku.set_values['puzzle']
+    return PuzzleResult(status, tuple(''.join(row) for row in grid), stats.as_dict())
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Solve one sodoku puzzle on many cores')
+    parser.add_argument('puzzle', help='puzzle on one line, row after row, with X, ., or 0 for unfilled spaces')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--timeout', type=float, default=None, help='seconds to search for')
+    parser.add_argument('--node-budget', type=int, default=NODE_BUDGET,
+                        help='decision paths searched in a subproblem before it is split again')
+    args = parser.parse_args(argv)
+    start_time = time.time()
+    result = solve_parallel(puzzle_from_string(args.puzzle), args.workers, args.timeout, args.node_budget)
+    print('{} in {} seconds after {} decision paths'.format(result.status, time.time() - start_time,
+                                                              result.stats['nodes']))
+    for row in result.grid:
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import unittest
+import sodoku_parallel
+import sodoku_solver
+
+class TestSodokuParallelMethods(unittest.TestCase):
+
+    # Without propagation rules this puzzle needs dozens of decision paths
+    exampleHardPuzzle = '1....7.9..3..2...8..96..5....53..9...1..8...26....4...3......1..4......7..7...3..'
+    exampleEasyPuzzle = '1X7XX6XXXXX4XX98X7X5X2XXXX9379XX54XXX8X1X7X2XXX16XX7856XXXX8X9X9X84XX2XXX4X9XX1X8'
+    exampleWrongPuzzle = '123456789' * 9
+    # The puzzle is only unsolvable once a few guesses are made
+    exampleUnsolvablePuzzle = '1X6XX7X484X8XXXX9XX9X48XXX1XX5X2X3XXXXX354XXXXX3X6X7XX6XXX75X8XX8XXXX9X595X8XX4XX'
+
+    def assertSolves(self, line, puzzle):
+        self.assertTrue(sodoku_solver.Sodoku(line).is_solved())
+        for clue, value in zip(puzzle, line):
+            if clue != '.':
+                self.assertEqual(value, clue)
+
+    def test_expand(self):
+        board = sodoku_solver.puzzle_to_string(sodoku_solver.puzzle_from_string(self.exampleHardPuzzle))
+        solution, boards, stats = sodoku_parallel.expand(board, {'rules': []})
+        self.assertIsNone(solution)
+        self.assertGreater(len(boards), 1)
+        self.assertGreater(stats.nodes, 0)
+        # Every board is the puzzle with one more guess and its trivial spaces filled in
+        for child in boards:
+            self.assertLess(child.count('X'), board.count('X'))
+            for clue, value in zip(board, child):
+                if clue != 'X':
+                    self.assertEqual(value, clue)
+        solution, boards, _ = sodoku_parallel.expand(self.exampleEasyPuzzle, {})
+        self.assertEqual(boards, [])
+        self.assertTrue(sodoku_solver.Sodoku(solution).is_solved())
+
+    def test_split(self):
+        solution, boards, _ = sodoku_parallel.split(self.exampleHardPuzzle.replace('.', 'X'), 8, {'rules': []})
+        self.assertIsNone(solution)
+        self.assertGreaterEqual(len(boards), 8)
+        self.assertEqual(sodoku_parallel.split(self.exampleUnsolvablePuzzle, 8, {})[:2], (None, []))
+
+    def test_solve_parallel(self):
+        result = sodoku_parallel.solve_parallel(self.exampleHardPuzzle, workers=2, rules=[])
+        self.assertEqual(result.status, 'solved')
+        self.assertSolves(result.line, self.exampleHardPuzzle)
+        self.assertGreater(result.stats['nodes'], 0)
+        result = sodoku_parallel.solve_parallel(self.exampleEasyPuzzle, workers=2)
+        self.assertEqual(result.status, 'solved')
+        self.assertSolves(result.line, self.exampleEasyPuzzle.replace('X', '.'))
+        result = sodoku_parallel.solve_parallel(self.exampleUnsolvablePuzzle, workers=2)
+        self.assertEqual(result.status, 'unsolvable')
+        self.assertEqual(result.line, self.exampleUnsolvablePuzzle)
+        with self.assertRaises(ValueError):
+            sodoku_parallel.solve_parallel(self.exampleWrongPuzzle, workers=2)
+
+    def test_resplit(self):
+        # With a budget of one decision path, subproblems are split again until they are solved by the split itself
+        result = sodoku_parallel.solve_parallel(self.exampleHardPuzzle, workers=2, node_budget=1, rules=[])
+        self.assertEqual(result.status, 'solved')
+        self.assertSolves(result.line, self.exampleHardPuzzle)
+        result = sodoku_parallel.solve_parallel(self.exampleUnsolvablePuzzle, workers=2, node_budget=1)
+        self.assertEqual(result.status, 'unsolvable')
+
+    def test_timeout(self):
+        result = sodoku_parallel.solve_parallel(self.exampleHardPuzzle, workers=2, timeout=0, rules=[])
+        self.assertEqual(result.status, 'timeout')
+        self.assertEqual(result.line, self.exampleHardPuzzle.replace('.', 'X'))
+
+    def test_other_sizes(self):
+        result = sodoku_parallel.solve_parallel('X' * 256, workers=2)
+        self.assertEqual(result.status, 'solved')
+        self.assertEqual(len(result.grid), 16)
+        self.assertTrue(sodoku_solver.Sodoku(result.line).is_solved())
+
+if __name__ == '__main__':
+    unittest.main()
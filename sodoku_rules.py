@@ -0,0 +1,116 @@
+import functools
+import itertools
+from typing import Set, Tuple
+
+from sodoku_board import get_unit_table
+
+# Propagation rules run when no naked or hidden single is left. Each rule takes a Sodoku with possible_values built
+# and returns the (i, j, value) possible values it proves can not be placed, without changing the puzzle. Every
+# elimination follows from the same state, so the Sodoku can apply all of them at once.
+
+
+# Naked subsets: if n unfilled spaces of a constraint only have n possible values between them, those values must go
+# in those spaces, so no other space of the constraint can hold them
+def find_naked_subsets(sodoku, n: int) -> Set[Tuple[int, int, str]]:
+    set_puzzle = sodoku.set_values['puzzle']
+    possible_puzzle = sodoku.possible_values['puzzle']
+    eliminations = set()
+    for unit in get_unit_table(sodoku.box_size):
+        unfilled = [(i, j) for i, j in unit if set_puzzle[i][j] == 'X']
+        if len(unfilled) <= n:
+            continue
+        small = [(i, j) for i, j in unfilled if 2 <= len(possible_puzzle[i][j]) <= n]
+        for subset in itertools.combinations(small, n):
+            values = set().union(*(possible_puzzle[i][j] for i, j in subset))
+            if len(values) != n:
+                continue
+            for i, j in unfilled:
+                if (i, j) not in subset:
+                    eliminations.update((i, j, value) for value in values & possible_puzzle[i][j])
+    return eliminations
+
+
+# Hidden subsets: if n values of a constraint can only go in the same n spaces, those spaces can not hold anything else
+def find_hidden_subsets(sodoku, n: int) -> Set[Tuple[int, int, str]]:
+    possible_puzzle = sodoku.possible_values['puzzle']
+    eliminations = set()
+    for constraints in [sodoku.possible_values['rows'], sodoku.possible_values['cols'],
+                        sodoku.possible_values['groups']]:
+        for constraint in constraints:
+            few = [(value, coords) for value, coords in constraint.items() if 2 <= len(coords) <= n]
+            for subset in itertools.combinations(few, n):
+                spaces = set().union(*(coords for value, coords in subset))
+                if len(spaces) != n:
+                    continue
+                values = {value for value, coords in subset}
+                for i, j in spaces:
+                    eliminations.update((i, j, value) for value in possible_puzzle[i][j] - values)
+    return eliminations
+
+
+# Pointing pairs: if a value can only go in one row (or col) of a group, it must be placed in that group, so the rest
+# of the row (or col) can not hold it
+def find_pointing_pairs(sodoku) -> Set[Tuple[int, int, str]]:
+    eliminations = set()
+    for g, constraint in enumerate(sodoku.possible_values['groups']):
+        for value, coords in constraint.items():
+            for axis, lines in enumerate([sodoku.possible_values['rows'], sodoku.possible_values['cols']]):
+                indexes = {coord[axis] for coord in coords}
+                if len(indexes) != 1:
+                    continue
+                for i, j in lines[indexes.pop()].get(value, []):
+                    if sodoku.group_indexes[i][j] != g:
+                        eliminations.add((i, j, value))
+    return eliminations
+
+
+# Box-line reduction: if a value can only go in one group along a row (or col), it must be placed on that row (or
+# col), so the rest of the group can not hold it
+def find_box_line_reductions(sodoku) -> Set[Tuple[int, int, str]]:
+    eliminations = set()
+    for axis, lines in enumerate([sodoku.possible_values['rows'], sodoku.possible_values['cols']]):
+        for index, constraint in enumerate(lines):
+            for value, coords in constraint.items():
+                groups = {sodoku.group_indexes[i][j] for i, j in coords}
+                if len(groups) != 1:
+                    continue
+                for coord in sodoku.possible_values['groups'][groups.pop()].get(value, []):
+                    if coord[axis] != index:
+                        eliminations.add((coord[0], coord[1], value))
+    return eliminations
+
+
+# X-Wing: if a value can only go in the same two cols of two rows, it must take both cols in those rows, so no other
+# row can hold it in those cols. The same goes for rows and cols swapped
+def find_x_wings(sodoku) -> Set[Tuple[int, int, str]]:
+    eliminations = set()
+    for axis, lines, crosses in [(0, sodoku.possible_values['rows'], sodoku.possible_values['cols']),
+                                 (1, sodoku.possible_values['cols'], sodoku.possible_values['rows'])]:
+        for value in sodoku.symbols:
+            # Lines where the value has exactly two positions, keyed by those positions
+            lines_by_positions = {}
+            for index, constraint in enumerate(lines):
+                coords = constraint.get(value, [])
+                if len(coords) == 2:
+                    positions = tuple(coord[1 - axis] for coord in coords)
+                    lines_by_positions.setdefault(positions, []).append(index)
+            for positions, indexes in lines_by_positions.items():
+                for pair in itertools.combinations(indexes, 2):
+                    for position in positions:
+                        for coord in crosses[position].get(value, []):
+                            if coord[axis] not in pair:
+                                eliminations.add((coord[0], coord[1], value))
+    return eliminations
+
+
+# Rules by name, in the order they are tried. Cheaper rules come first, and once a rule eliminates anything the
+# singles are filled again before the next rule is tried
+RULES = {
+    'pointing_pairs': find_pointing_pairs,
+    'box_line_reduction': find_box_line_reductions,
+    'naked_pairs': functools.partial(find_naked_subsets, n=2),
+    'hidden_pairs': functools.partial(find_hidden_subsets, n=2),
+    'naked_triples': functools.partial(find_naked_subsets, n=3),
+    'hidden_triples': functools.partial(find_hidden_subsets, n=3),
+    'x_wing': find_x_wings,
+}
@@ -0,0 +1,91 @@
+import unittest
+import sodoku_dlx
+import sodoku_rules
+import sodoku_solver
+
+class TestSodokuRulesMethods(unittest.TestCase):
+
+    exampleHardPuzzle2 = '..6..7.484.8....9..9.48...1..5.2.3.....354.....3.6.7..6...75.8..8....9.595.8..4..'
+
+    def setUp(self):
+        # Rules are tried one at a time on an empty board where a few possible values are removed by hand
+        self.sodoku = sodoku_solver.Sodoku(sodoku_solver.puzzle_from_string('.' * 81), rules=[])
+        self.sodoku.update_possible_values()
+
+    # Remove every possible value of (i, j) but values
+    def keep_values(self, i, j, values):
+        for value in self.sodoku.possible_values['puzzle'][i][j] - set(values):
+            self.sodoku.remove_possible_value(i, j, value)
+
+    def test_naked_subsets(self):
+        self.keep_values(0, 0, '12')
+        self.keep_values(0, 1, '12')
+        eliminations = sodoku_rules.RULES['naked_pairs'](self.sodoku)
+        # The rest of row 0 and group 0
+        self.assertEqual(len(eliminations), 13 * 2)
+        self.assertIn((0, 8, '1'), eliminations)
+        self.assertIn((2, 2, '2'), eliminations)
+        self.assertNotIn((1, 8, '1'), eliminations)
+        self.keep_values(3, 0, '12')
+        self.keep_values(3, 1, '23')
+        self.keep_values(3, 2, '13')
+        # The rest of row 3 and group 3
+        self.assertEqual(len(sodoku_rules.RULES['naked_triples'](self.sodoku)), 12 * 3)
+
+    def test_hidden_subsets(self):
+        for j in range(2, 9):
+            self.sodoku.remove_possible_value(0, j, '1')
+            self.sodoku.remove_possible_value(0, j, '2')
+        eliminations = sodoku_rules.RULES['hidden_pairs'](self.sodoku)
+        self.assertEqual(eliminations, {(0, j, value) for j in range(2) for value in '3456789'})
+        self.assertEqual(sodoku_rules.RULES['hidden_triples'](self.sodoku), set())
+        for j in range(3, 9):
+            for value in '123':
+                self.sodoku.remove_possible_value(3, j, value)
+        eliminations = sodoku_rules.RULES['hidden_triples'](self.sodoku)
+        self.assertEqual(eliminations, {(3, j, value) for j in range(3) for value in '456789'})
+
+    def test_pointing_pairs(self):
+        for i in range(1, 3):
+            for j in range(3):
+                self.sodoku.remove_possible_value(i, j, '1')
+        eliminations = sodoku_rules.RULES['pointing_pairs'](self.sodoku)
+        self.assertEqual(eliminations, {(0, j, '1') for j in range(3, 9)})
+
+    def test_box_line_reduction(self):
+        for j in range(3, 9):
+            self.sodoku.remove_possible_value(0, j, '1')
+        eliminations = sodoku_rules.RULES['box_line_reduction'](self.sodoku)
+        self.assertEqual(eliminations, {(i, j, '1') for i in range(1, 3) for j in range(3)})
+
+    def test_x_wing(self):
+        for i in [0, 4]:
+            for j in range(9):
+                if j not in [0, 4]:
+                    self.sodoku.remove_possible_value(i, j, '1')
+        eliminations = sodoku_rules.RULES['x_wing'](self.sodoku)
+        self.assertEqual(eliminations, {(i, j, '1') for i in range(9) for j in [0, 4] if i not in [0, 4]})
+
+    def test_rules_are_sound(self):
+        puzzle = sodoku_solver.puzzle_from_string(self.exampleHardPuzzle2)
+        solution = sodoku_dlx.DLXSodoku(puzzle).solve()
+        sodoku = sodoku_solver.Sodoku(puzzle, rules=[])
+        sodoku.update_possible_values()
+        for rule in sodoku_rules.RULES.values():
+            for i, j, value in rule(sodoku):
+                self.assertNotEqual(solution[i][j], value)
+
+    def test_solve_with_rules(self):
+        without_rules = sodoku_solver.Sodoku(sodoku_solver.puzzle_from_string(self.exampleHardPuzzle2), rules=[])
+        without_rules.solve()
+        sodoku = sodoku_solver.Sodoku(sodoku_solver.puzzle_from_string(self.exampleHardPuzzle2),
+                                      rules=sodoku_rules.RULES)
+        sodoku.solve()
+        self.assertEqual(sodoku.set_values['puzzle'], without_rules.set_values['puzzle'])
+        self.assertLess(sodoku.threads, without_rules.threads)
+        self.assertGreater(sodoku.eliminations['pointing_pairs'], 0)
+        with self.assertRaises(ValueError):
+            sodoku_solver.Sodoku(rules=['unknown'])
+
+if __name__ == '__main__':
+    unittest.main()
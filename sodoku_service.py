@@ -0,0 +1,279 @@
+import argparse
+import asyncio
+import concurrent.futures
+import contextlib
+import itertools
+import multiprocessing
+import os
+import time
+from typing import List, Optional, Tuple, Union
+
+from sodoku_batch import INVALID, BatchResult
+from sodoku_cache import UNSOLVABLE as CACHED_UNSOLVABLE
+from sodoku_cache import CanonicalForm, SolutionCache, canonicalize, from_canonical, is_solution, to_canonical
+from sodoku_solver import BACKENDS, SOLVED, UNSOLVABLE, Sodoku, puzzle_from_string, puzzle_to_string
+
+# Puzzles waiting for a worker before solve blocks the callers adding more
+MAX_PENDING = 64
+# Most puzzles sent to a worker process at a time, and how long (in seconds) to wait for more to fill a batch
+BATCH_SIZE = 8
+BATCH_DELAY = 0.002
+# Responses a server connection can have in flight before it stops reading requests
+MAX_PIPELINED = 16
+
+
+# Solve one (index, puzzle, backend, timeout, max_nodes) job in a worker process. Limits stop the search early, and the
+# result is then None with the status of the limit that was reached
+def solve_request(job: Tuple[int, List[List[str]], str, Optional[float], Optional[int]]) -> BatchResult:
+    index, puzzle, backend, timeout, max_nodes = job
+    start_time = time.perf_counter()
+    try:
+        # Jobs hold parsed matrices. A string is a bad line kept by read_puzzles, not a puzzle to parse again
+        if isinstance(puzzle, str):
+            raise ValueError('Invalid puzzle line', puzzle)
+        status, solution, _ = Sodoku(puzzle).find_solution(backend, timeout, max_nodes)
+    except ValueError:
+        status = INVALID
+    solution = solution if status == SOLVED else None
+    return BatchResult(index, solution, status, time.perf_counter() - start_time)
+
+
+# Solve a batch of jobs in one worker process, so small puzzles don't each pay for a round trip to the pool
+def solve_requests(jobs: List[Tuple[int, List[List[str]], str, Optional[float], Optional[int]]]) -> List[BatchResult]:
+    return [solve_request(job) for job in jobs]
+
+
+# Map a cached canonical solution back onto puzzle, returning it only if it really solves the puzzle
+def check_cached(puzzle: List[List[str]], cached: str, form: CanonicalForm) -> Optional[List[List[str]]]:
+    solution = from_canonical(cached, form)
+    return solution if is_solution(puzzle, solution) else None
+
+
+# Solves puzzles for asyncio code on a pool of worker processes, so the event loop is never blocked by a search.
+# Puzzles wait in a queue of at most max_pending, and solve waits for room when it is full, so a burst of requests
+# holds a bounded number of puzzles in memory. One dispatcher per worker takes up to batch_size puzzles at a time from
+# the queue, waiting at most batch_delay seconds for a batch to fill.
+# timeout and max_nodes are applied to every solve ('sets' backend only). If a SolutionCache is given, puzzles are
+# looked up by canonical form before they are queued, and solved or unsolvable results are stored in it. Canonical
+# forms are worked out and cached solutions checked on a thread, so lookups don't hold up other connections
+class SolvingService:
+    def __init__(self, workers: Optional[int] = None, max_pending: int = MAX_PENDING, batch_size: int = BATCH_SIZE,
+                 batch_delay: float = BATCH_DELAY, backend: str = 'sets', timeout: Optional[float] = None,
+                 max_nodes: Optional[int] = None, cache: Optional[SolutionCache] = None):
+        if backend != 'sets' and backend not in BACKENDS:
+            raise ValueError('Unknown backend', backend)
+        if backend != 'sets' and (timeout is not None or max_nodes is not None):
+            raise ValueError('Limits are only supported by the sets backend', backend)
+        self.workers = workers or os.cpu_count() or 1
+        # Forked workers would keep copies of the sockets open at the time of the fork, so closed connections would
+        # never reach their clients. Workers are started from a clean process instead
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        self.executor = concurrent.futures.ProcessPoolExecutor(self.workers, context)
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.backend = backend
+        self.timeout = timeout
+        self.max_nodes = max_nodes
+        self.cache = cache
+        # Index given to the next request, so results can be matched to the requests in logs
+        self.indexes = itertools.count()
+        # The queue and dispatchers belong to the event loop they were started in, and are started again if solve is
+        # called from another one
+        self.loop = None
+        self.queue = None
+        self.dispatchers = []
+
+    # Start the dispatchers in the running event loop
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(self.max_pending)
+        self.dispatchers = [self.loop.create_task(self.dispatch()) for _ in range(self.workers)]
+
+    # Solve a 2D matrix puzzle or a one line puzzle string, waiting for room in the queue if it is full
+    # Return a BatchResult whose index counts the requests made to this service
+    async def solve(self, puzzle: Union[str, List[List[str]]]) -> BatchResult:
+        if self.loop is not asyncio.get_running_loop():
+            self.start()
+        index = next(self.indexes)
+        start_time = time.perf_counter()
+        try:
+            if isinstance(puzzle, str):
+                puzzle = puzzle_from_string(puzzle)
+            else:
+                # Matrices are checked like lines, so a bad puzzle is answered here instead of reaching a worker
+                if any(len(row) != len(puzzle) for row in puzzle):
+                    raise ValueError('Puzzle rows must be as long as the puzzle is high')
+                puzzle = puzzle_from_string(puzzle_to_string(puzzle))
+            form = await self.loop.run_in_executor(None, canonicalize, puzzle) if self.cache is not None else None
+        except ValueError:
+            return BatchResult(index, None, INVALID, time.perf_counter() - start_time)
+        if form is not None:
+            cached = self.cache.get(form.key)
+            if cached == CACHED_UNSOLVABLE:
+                self.cache.hits += 1
+                return BatchResult(index, None, UNSOLVABLE, time.perf_counter() - start_time)
+            if cached is not None:
+                solution = await self.loop.run_in_executor(None, check_cached, puzzle, cached, form)
+                if solution is not None:
+                    self.cache.hits += 1
+                    return BatchResult(index, solution, SOLVED, time.perf_counter() - start_time)
+            self.cache.misses += 1
+
+        future = self.loop.create_future()
+        await self.queue.put(((index, puzzle, self.backend, self.timeout, self.max_nodes), future))
+        result = await future
+        if form is not None and result.status in (SOLVED, UNSOLVABLE):
+            self.cache.put(form.key, CACHED_UNSOLVABLE if result.solution is None
+                           else to_canonical(result.solution, form))
+        return result
+
+    # Send batches from the queue to the pool until cancelled
+    async def dispatch(self):
+        while True:
+            batch = [await self.queue.get()]
+            deadline = self.loop.time() + self.batch_delay
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), deadline - self.loop.time()))
+                except asyncio.TimeoutError:
+                    break
+            # Callers that gave up while waiting don't need their puzzle solved
+            batch = [(job, future) for job, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+            try:
+                results = await self.loop.run_in_executor(self.executor, solve_requests, [job for job, _ in batch])
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    # Stop the dispatchers and the worker processes
+    async def close(self):
+        for dispatcher in self.dispatchers:
+            dispatcher.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+        self.dispatchers = []
+        self.loop = None
+        # Waiting for the workers to exit would block the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self.executor.shutdown)
+
+    async def __aenter__(self) -> 'SolvingService':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+# Service used by solve_async, started on first use
+default_service = None
+
+
+# Solve a puzzle without blocking the event loop, on a SolvingService shared by every caller in the process
+async def solve_async(puzzle: Union[str, List[List[str]]]) -> BatchResult:
+    global default_service
+    if default_service is None:
+        default_service = SolvingService()
+    return await default_service.solve(puzzle)
+
+
+# Answer one connection of the line protocol: every line sent is a one line puzzle, answered in order with
+# <solution, or the puzzle if it was not solved> <status> <seconds>
+# Requests are solved concurrently, but at most MAX_PIPELINED are read ahead of the responses written
+async def handle_connection(service: SolvingService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    responses = asyncio.Queue(MAX_PIPELINED)
+
+    # Cancel the solves of requests that will never be answered. This also makes room for a request the reader is
+    # waiting to queue, so it sees the responder has stopped
+    def cancel_queued():
+        while not responses.empty():
+            _, task = responses.get_nowait()
+            if task is not None:
+                task.cancel()
+
+    async def respond():
+        try:
+            while True:
+                line, task = await responses.get()
+                if task is None:
+                    return
+                result = await task
+                puzzle = line if result.solution is None else puzzle_to_string(result.solution)
+                writer.write('{} {} {:.6f}\n'.format(puzzle, result.status, result.seconds).encode())
+                await writer.drain()
+        finally:
+            cancel_queued()
+
+    responder = asyncio.create_task(respond())
+    try:
+        while not responder.done():
+            line = (await reader.readline()).decode().strip()
+            if not line:
+                if reader.at_eof():
+                    break
+                continue
+            await responses.put((line, asyncio.create_task(service.solve(line))))
+        await responses.put((None, None))
+        await responder
+    except ConnectionError:
+        pass
+    finally:
+        # Cancelling the responder also cancels the solve it is waiting for
+        responder.cancel()
+        cancel_queued()
+        writer.close()
+        # A client that reset the connection makes closing raise too
+        with contextlib.suppress(ConnectionError):
+            await writer.wait_closed()
+
+
+# Serve the line protocol on host and port until the server is closed
+async def serve(service: SolvingService, host: str, port: int) -> asyncio.AbstractServer:
+    return await asyncio.start_server(lambda reader, writer: handle_connection(service, reader, writer), host, port)
+
+
+async def run_server(args: argparse.Namespace):
+    cache = SolutionCache(path=args.cache) if args.use_cache else None
+    async with SolvingService(args.workers, args.max_pending, args.batch_size, args.batch_delay, args.backend,
+                              args.timeout, args.max_nodes, cache) as service:
+        server = await serve(service, args.host, args.port)
+        for socket in server.sockets:
+            print('Serving sodoku puzzles on {}:{}'.format(*socket.getsockname()[:2]), flush=True)
+        try:
+            await server.serve_forever()
+        finally:
+            if cache is not None:
+                cache.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Solve sodoku puzzles sent one per line over TCP')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--max-pending', type=int, default=MAX_PENDING,
+                        help='puzzles waiting for a worker before reading more requests stops')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='most puzzles sent to a worker at a time')
+    parser.add_argument('--batch-delay', type=float, default=BATCH_DELAY,
+                        help='seconds to wait for a batch to fill')
+    parser.add_argument('--backend', default='sets', choices=['sets'] + list(BACKENDS))
+    parser.add_argument('--timeout', type=float, default=None, help='seconds to search every puzzle for')
+    parser.add_argument('--max-nodes', type=int, default=None, help='decision paths to search every puzzle for')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help='solve every puzzle instead of looking up ones seen before')
+    parser.add_argument('--cache', default=None, help='file to keep solutions in between runs')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(run_server(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+import asyncio
+import socket
+import struct
+import unittest
+import sodoku_cache
+import sodoku_service
+import sodoku_solver
+
+class TestSodokuServiceMethods(unittest.IsolatedAsyncioTestCase):
+
+    exampleEasyPuzzle = '1X7XX6XXXXX4XX98X7X5X2XXXX9379XX54XXX8X1X7X2XXX16XX7856XXXX8X9X9X84XX2XXX4X9XX1X8'
+    exampleHardPuzzle2 = 'XX6XX7X484X8XXXX9XX9X48XXX1XX5X2X3XXXXX354XXXXX3X6X7XX6XXX75X8XX8XXXX9X595X8XX4XX'
+    exampleWrongPuzzle = '123456789' * 9
+    # (0, 8) can only be a 9, but there is already a 9 in its col
+    exampleUnsolvablePuzzle = '12345678X' + 'XXXXXXXX9' + 'X' * 63
+
+    async def asyncSetUp(self):
+        self.service = sodoku_service.SolvingService(workers=2, max_pending=4, batch_size=3)
+
+    async def asyncTearDown(self):
+        await self.service.close()
+
+    def assertSolves(self, solution, puzzle):
+        self.assertTrue(sodoku_solver.Sodoku(solution).is_solved())
+        for clue, value in zip(puzzle, sodoku_solver.puzzle_to_string(solution)):
+            if clue != 'X':
+                self.assertEqual(value, clue)
+
+    def test_solve_request(self):
+        puzzle = sodoku_solver.puzzle_from_string(self.exampleHardPuzzle2)
+        result = sodoku_service.solve_request((5, puzzle, 'sets', None, None))
+        self.assertEqual((result.index, result.status), (5, 'solved'))
+        self.assertSolves(result.solution, self.exampleHardPuzzle2)
+        # The puzzle passed in is left as it was
+        self.assertEqual(sodoku_solver.puzzle_to_string(puzzle), self.exampleHardPuzzle2)
+        result = sodoku_service.solve_request((0, puzzle, 'sets', None, 1))
+        self.assertEqual(result.status, 'node_limit')
+        self.assertIsNone(result.solution)
+        wrong = sodoku_solver.puzzle_from_string(self.exampleWrongPuzzle)
+        self.assertEqual(sodoku_service.solve_request((0, wrong, 'sets', None, None)).status, 'invalid')
+
+    async def test_solve(self):
+        result = await self.service.solve(self.exampleEasyPuzzle)
+        self.assertEqual(result.status, 'solved')
+        self.assertSolves(result.solution, self.exampleEasyPuzzle)
+        result = await self.service.solve(sodoku_solver.puzzle_from_string(self.exampleUnsolvablePuzzle))
+        self.assertEqual(result.status, 'unsolvable')
+        self.assertIsNone(result.solution)
+        self.assertEqual((await self.service.solve(self.exampleWrongPuzzle)).status, 'invalid')
+        self.assertEqual((await self.service.solve('123')).status, 'invalid')
+
+    async def test_invalid_in_batch(self):
+        # A bad puzzle is answered on its own instead of failing the other puzzles of its batch
+        service = sodoku_service.SolvingService(workers=1, batch_size=4)
+        wrongSize = [['X'] * 8 for i in range(8)]
+        try:
+            results = await asyncio.gather(service.solve(self.exampleEasyPuzzle), service.solve(wrongSize),
+                                           service.solve([['1', 'X']] * 9), service.solve(self.exampleEasyPuzzle))
+        finally:
+            await service.close()
+        self.assertEqual([result.status for result in results], ['solved', 'invalid', 'invalid', 'solved'])
+        result = sodoku_service.solve_request((0, wrongSize, 'sets', None, None))
+        self.assertEqual((result.status, result.solution), ('invalid', None))
+        result = sodoku_service.solve_request((0, '.' * 16, 'sets', None, None))
+        self.assertEqual((result.status, result.solution), ('invalid', None))
+
+    async def test_solve_async(self):
+        try:
+            result = await sodoku_service.solve_async(self.exampleHardPuzzle2)
+        finally:
+            await sodoku_service.default_service.close()
+            sodoku_service.default_service = None
+        self.assertEqual(result.status, 'solved')
+        self.assertSolves(result.solution, self.exampleHardPuzzle2)
+
+    async def test_solve_many(self):
+        # More requests than fit in the queue wait for room instead of failing
+        puzzles = [self.exampleEasyPuzzle, self.exampleHardPuzzle2, self.exampleUnsolvablePuzzle] * 5
+        results = await asyncio.gather(*(self.service.solve(puzzle) for puzzle in puzzles))
+        self.assertEqual([result.status for result in results], ['solved', 'solved', 'unsolvable'] * 5)
+        self.assertEqual(sorted(result.index for result in results), list(range(15)))
+        for result, puzzle in zip(results, puzzles):
+            if result.solution is not None:
+                self.assertSolves(result.solution, puzzle)
+        self.assertLessEqual(self.service.queue.qsize(), 4)
+
+    async def test_limits(self):
+        service = sodoku_service.SolvingService(workers=1, max_nodes=1)
+        try:
+            result = await service.solve(self.exampleHardPuzzle2)
+        finally:
+            await service.close()
+        self.assertEqual(result.status, 'node_limit')
+        with self.assertRaises(ValueError):
+            sodoku_service.SolvingService(workers=1, backend='dlx', timeout=1)
+
+    async def test_cache(self):
+        cache = sodoku_cache.SolutionCache()
+        service = sodoku_service.SolvingService(workers=1, cache=cache)
+        try:
+            first = await service.solve(self.exampleHardPuzzle2)
+            second = await service.solve(self.exampleHardPuzzle2)
+        finally:
+            await service.close()
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(second.solution, first.solution)
+        puzzle = sodoku_solver.puzzle_from_string(self.exampleHardPuzzle2)
+        form = sodoku_cache.canonicalize(puzzle)
+        cached = sodoku_cache.to_canonical(first.solution, form)
+        self.assertEqual(sodoku_service.check_cached(puzzle, cached, form), first.solution)
+        # A cached solution that does not solve the puzzle is not used
+        self.assertIsNone(sodoku_service.check_cached(puzzle, cached[1:] + cached[0], form))
+
+    async def test_server(self):
+        server = await sodoku_service.serve(self.service, '127.0.0.1', 0)
+        try:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            writer.write('{}\n{}\n\n{}\n'.format(self.exampleHardPuzzle2, self.exampleUnsolvablePuzzle,
+                                                 self.exampleEasyPuzzle).encode())
+            writer.write_eof()
+            response = await asyncio.wait_for(reader.read(), 30)
+            lines = [line.split() for line in response.decode().splitlines()]
+            writer.close()
+        finally:
+            server.close()
+            await server.wait_closed()
+        # Responses come in the order of the requests, blank lines are skipped
+        self.assertEqual([line[1] for line in lines], ['solved', 'unsolvable', 'solved'])
+        self.assertSolves(sodoku_solver.puzzle_from_string(lines[0][0]), self.exampleHardPuzzle2)
+        self.assertEqual(lines[1][0], self.exampleUnsolvablePuzzle)
+        self.assertSolves(sodoku_solver.puzzle_from_string(lines[2][0]), self.exampleEasyPuzzle)
+
+    async def test_server_reset(self):
+        # A client that resets the connection with requests in flight leaves no error or solve behind
+        server = await sodoku_service.serve(self.service, '127.0.0.1', 0)
+        await self.service.solve(self.exampleEasyPuzzle)
+        tasks = asyncio.all_tasks()
+        try:
+            with self.assertNoLogs('asyncio', 'ERROR'):
+                reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+                writer.write((self.exampleHardPuzzle2 + '\n').encode() * 200)
+                await reader.readline()
+                # Closing with a zero linger time resets the connection
+                writer.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_LINGER,
+                                                           struct.pack('ii', 1, 0))
+                writer.transport.abort()
+                for _ in range(100):
+                    if asyncio.all_tasks() <= tasks:
+                        break
+                    await asyncio.sleep(0.05)
+            self.assertLessEqual(asyncio.all_tasks(), tasks)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+if __name__ == '__main__':
+    unittest.main()
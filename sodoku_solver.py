@@ -1,17 +1,110 @@
-import copy
+import bisect
 import heapq
+import importlib
+import itertools
+import math
 import re
 import sys
+import threading
 import time
-from typing import List, Set, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+
+from sodoku_board import BOX_SIZE, get_box_size, get_group_table, get_peer_table, get_symbols
+from sodoku_rules import RULES
+from sodoku_stats import SolverStats
 
 # TODO: Create Exception class for unsolvable puzzle
 
 # Size of sodoku puzzle. Default is 9x9
-SIZE = 9
+SIZE = BOX_SIZE * BOX_SIZE
+# Propagation rules used unless others are picked: none, so only naked and hidden singles are filled. The rules cut
+# decision paths on hard puzzles, but on the bundled corpora they only break even there and make mostly empty boards
+# 5x slower
+DEFAULT_RULES = ()
+# Rules worth opting into for puzzles that need a lot of guessing. Triples and X-Wing rarely find anything these miss,
+# so they cost more time than the search they save
+PAIR_RULES = ('pointing_pairs', 'box_line_reduction', 'naked_pairs', 'hidden_pairs')
+
+# Statuses of a solve. The last three mean the search was stopped before it finished
+SOLVED = 'solved'
+UNSOLVABLE = 'unsolvable'
+TIMED_OUT = 'timeout'
+NODE_LIMIT = 'node_limit'
+CANCELLED = 'cancelled'
+
+
+# Token for stopping a solve from another thread. The search checks it on every decision path
+# event can be a multiprocessing Event, so one token can stop solves in many worker processes
+class CancellationToken:
+    def __init__(self, event = None):
+        self.event = event if event is not None else threading.Event()
+
+    def cancel(self):
+        self.event.set()
+
+    def is_cancelled(self) -> bool:
+        return self.event.is_set()
+
+
+# Raised from the search when a limit set by solve is reached. status is TIMED_OUT, NODE_LIMIT, or CANCELLED
+class SolveLimitReached(Exception):
+    def __init__(self, status: str):
+        super().__init__('Search stopped: ' + status)
+        self.status = status
+
+
+# Outcome of solve. puzzle is the solution if status is SOLVED, else the most filled in board seen on the way
+class SolveResult(NamedTuple):
+    status: str
+    puzzle: List[List[str]]
+    stats: SolverStats
+
+
+# Outcome of solve_puzzle, made of strings and tuples so it can be shared and cached without copying
+# grid holds the rows of the solution if status is SOLVED, else the most filled in board seen on the way. stats is
+# the SolverStats.as_dict() of this solve
+class PuzzleResult(NamedTuple):
+    status: str
+    grid: Tuple[str, ...]
+    stats: Dict[str, float]
+
+    # The grid written on one line, row after row
+    @property
+    def line(self) -> str:
+        return ''.join(self.grid)
+
 
 class Sodoku:
-    def __init__(self, puzzle = None):
+    # puzzle is a 2D matrix (rows can be lists or strings) or a one line puzzle string or bytes. It is copied, so the
+    # puzzle passed in is never changed. If it is None, it has to be read with get_input_and_parse before solving
+    # space_heuristic and value_heuristic name the branching heuristics in SPACE_HEURISTICS and VALUE_HEURISTICS
+    # box_size is the width of a group (3 for 9x9, 4 for 16x16, 5 for 25x25). It is taken from the puzzle if not given
+    # rules name the propagation rules in RULES tried when no naked or hidden single is left, like PAIR_RULES
+    # progress is called with this Sodoku every progress_interval decision paths, so callers can report on long searches
+    def __init__(self, puzzle = None, space_heuristic: str = 'mrv', value_heuristic: str = 'ascending',
+                 box_size: int = None, rules: Iterable[str] = DEFAULT_RULES,
+                 progress: Optional[Callable[['Sodoku'], None]] = None, progress_interval: int = 1000):
+        if space_heuristic not in SPACE_HEURISTICS:
+            raise ValueError('Unknown space heuristic', space_heuristic)
+        if value_heuristic not in VALUE_HEURISTICS:
+            raise ValueError('Unknown value heuristic', value_heuristic)
+        rules = list(rules)
+        for rule in rules:
+            if rule not in RULES:
+                raise ValueError('Unknown propagation rule', rule)
+        if isinstance(puzzle, (str, bytes)):
+            puzzle = puzzle_from_string(puzzle)
+        elif puzzle is not None:
+            puzzle = [list(row) for row in puzzle]
+        if box_size is None:
+            box_size = get_box_size(len(puzzle)) if puzzle is not None else BOX_SIZE
+        self.box_size = box_size
+        # size is the number of rows, cols, groups, and values of the puzzle
+        self.size = get_box_size(box_size * box_size) ** 2
+        # symbols are the values that can be placed, in order
+        self.symbols = get_symbols(self.size)
+        # group_indexes is a 2D matrix of the group index of each space
+        self.group_indexes = get_group_table(box_size)
         # Data structures dealing with values already set
         self.set_values = {
             # rows, cols, and groups are sets representing set values for each constraint
@@ -30,70 +123,105 @@ class Sodoku:
             'groups': None,
             # puzzle is a 2D matrix representing possible values (which is a set) for each board space
             'puzzle': None,
-            # min heap of all unfilled spaces (ordered by length of the list of possible values)
+            # min heap of all unfilled spaces (ordered by length of the list of possible values). Placements push a
+            # new entry whenever a space loses a possible value, so entries that no longer match the space are skipped
             'unfilled_spaces': None,
             # visited is a 2D matrix representing all visited values so we trim the decision branches we've already
             # visited. This is a 2D matrix containing sets
-            'visited': [[set() for i in range(SIZE)] for j in range(SIZE)],
+            'visited': [[set() for i in range(self.size)] for j in range(self.size)],
         }
-        self.threads = 0
+        # trail is the list of changes made to set_values and possible_values since possible_values were last
+        # rebuilt. Backtracking reverts a failed decision path by undoing the trail back to a saved length
+        self.trail = []
+        # stats counts nodes, backtracks, eliminations, and time spent while solving
+        self.stats = SolverStats(rules)
+        self.progress = progress
+        self.progress_interval = progress_interval
+        # Limits of the current solve: perf_counter time to stop at, most decision paths to explore, and a
+        # CancellationToken. best_partial is the most filled in board seen while any limit is set
+        self.deadline = None
+        self.max_nodes = None
+        self.cancel = None
+        self.best_partial = None
+        # peers is a 2D matrix of the coordinates sharing a row, col, or group with each space
+        self.peers = get_peer_table(box_size)
+        # choose_space picks the unfilled space to guess on and order_values the order its possible values are guessed
+        self.choose_space = SPACE_HEURISTICS[space_heuristic]
+        self.order_values = VALUE_HEURISTICS[value_heuristic]
+        self.rules = rules
+        # eliminations counts the possible values removed by each propagation rule
+        self.eliminations = self.stats.eliminations
 
     # Ask for input and parse into 2d array
     def get_input_and_parse(self):
         puzzle = []
         print('Input a sodoku puzzle! Insert X, ., or space for unfilled spaces')
 
-        #Get rows in sodoku puzzle. SIZE rows in every sodoku puzzle
-        for i in range(1, SIZE+1):
+        #Get rows in sodoku puzzle. size rows in every sodoku puzzle
+        for i in range(1, self.size+1):
             while(True):
                 rowString = input('Row {}: '.format(i))
                 if rowString == 'exit':
                     sys.exit('Exited!')
-                elif len(rowString) != SIZE:
-                    print('A valid row must have exactly {} characters in it! "exit" to quit'.format(SIZE))
+                elif len(rowString) != self.size:
+                    print('A valid row must have exactly {} characters in it! "exit" to quit'.format(self.size))
                 else:
                     break
-            rowString = re.sub(r'\D', 'X', rowString)
-            row = [char for char in rowString]
+            row = [char if char in self.symbols else 'X' for char in rowString]
             puzzle.append(row)
         self.set_values['puzzle'] = puzzle
         print('Solving the puzzle that looks like')
         self.pretty_print()
 
+    # Number of decision paths explored so far
+    @property
+    def threads(self) -> int:
+        return self.stats.nodes
+
     # Map groups to 1D array
-    # Groups will be a 3x3 array where [1][2] will map to [3*1-3*2][3*2-3*3]
-    @staticmethod
-    def get_group_index(i: int, j: int):
-        if i < 0 or j < 0 or i >= SIZE or j >= SIZE:
+    # Groups will be a box_size x box_size array where [1][2] will map to [3*1-3*2][3*2-3*3] for 3x3 groups
+    def get_group_index(self, i: int, j: int):
+        if i < 0 or j < 0 or i >= self.size or j >= self.size:
             raise ValueError('Index can not be negative or greater than the size of the puzzle')
-        groupRow = int(i / 3)
-        groupCol = int(j / 3)
-        # Turn 2D array of groups into 1D array
-        return groupRow * 3 + groupCol
+        return self.group_indexes[i][j]
 
     # Check if solved by checking whether there are any spaces left to fill. The puzzle should never be in a state
     # where all spaces are filled but it is not valid. This will throw an exception.
     def is_solved(self):
         if self.possible_values['unfilled_spaces'] is None:
             self.update_possible_values()
-        if len(self.possible_values['unfilled_spaces']) <= 0:
-            return True
-        return False
+        return self.get_most_constrained_space() is None
+
+    # Return the top of the unfilled_spaces heap as (<length of possible_values>, <(i, j) coordinates of space>),
+    # dropping entries that went out of date since they were pushed. Return None if there are no unfilled spaces
+    def get_most_constrained_space(self):
+        unfilled_spaces = self.possible_values['unfilled_spaces']
+        while unfilled_spaces:
+            count, (i, j) = unfilled_spaces[0]
+            if self.set_values['puzzle'][i][j] == 'X' and len(self.possible_values['puzzle'][i][j]) == count:
+                return unfilled_spaces[0]
+            heapq.heappop(unfilled_spaces)
+        return None
 
     # Initialize set_values rows, cols, and groups (sets representing set values for each constraint)
+    # Raise ValueError if there is no puzzle
     def init_set_values(self):
+        if self.set_values['puzzle'] is None:
+            raise ValueError('There is no puzzle to solve')
         puzzle = self.set_values['puzzle']
-        rows = [set() for i in range(SIZE)]
-        cols = [set() for i in range(SIZE)]
-        groups = [set() for i in range(SIZE)]
-        if puzzle is None:
-            self.get_input_and_parse()
+        rows = [set() for i in range(self.size)]
+        cols = [set() for i in range(self.size)]
+        groups = [set() for i in range(self.size)]
+        if len(puzzle) != self.size or any(len(row) != self.size for row in puzzle):
+            raise ValueError('Puzzle must have {0} rows of {0} spaces'.format(self.size))
         # Iterate through puzzle
-        for i in range(SIZE):
-            for j in range(SIZE):
+        for i in range(self.size):
+            for j in range(self.size):
                 # If there are unfilled spaces, ignore
                 if puzzle[i][j] == 'X':
                     continue
+                if puzzle[i][j] not in self.symbols:
+                    raise ValueError('Puzzle can only contain {} and X for unfilled spaces'.format(self.symbols))
                 # If there are duplicates in any set, puzzle will never be solved
                 if (puzzle[i][j] in rows[i] or puzzle[i][j] in cols[j]
                         or puzzle[i][j] in groups[self.get_group_index(i, j)]):
@@ -109,10 +237,11 @@ class Sodoku:
 
     # Initialize possible_values puzzle 2D matrix and
     def update_possible_values(self):
-        puzzle = [[None for i in range(SIZE)] for j in range(SIZE)]
-        rows = [{} for i in range(SIZE)]
-        cols = [{} for i in range(SIZE)]
-        groups = [{} for i in range(SIZE)]
+        start_time = time.perf_counter()
+        puzzle = [[None for i in range(self.size)] for j in range(self.size)]
+        rows = [{} for i in range(self.size)]
+        cols = [{} for i in range(self.size)]
+        groups = [{} for i in range(self.size)]
         unfilled_spaces = []
         if self.set_values['rows'] is None or self.set_values['cols'] is None or self.set_values['groups'] is None:
             self.init_set_values()
@@ -122,7 +251,7 @@ class Sodoku:
             # If this space isn't blank, then we return the space value itself
             if self.set_values['puzzle'][i][j] != 'X':
                 return {self.set_values['puzzle'][i][j]}
-            solution_set = {str(i) for i in range(1, SIZE + 1)}
+            solution_set = set(self.symbols)
             return (solution_set
                     .difference(self.set_values['rows'][i])
                     .difference(self.set_values['cols'][j])
@@ -130,8 +259,8 @@ class Sodoku:
                     .difference(self.possible_values['visited'][i][j]))
 
         # Iterate through puzzle
-        for i in range(SIZE):
-            for j in range(SIZE):
+        for i in range(self.size):
+            for j in range(self.size):
                 possible_values = get_possible_values(i, j)
                 if self.set_values['puzzle'][i][j] == 'X':
                     unfilled_spaces.append((len(possible_values), (i, j)))
@@ -142,6 +271,7 @@ class Sodoku:
                 puzzle[i][j] = possible_values
 
         heapq.heapify(unfilled_spaces)
+        self.trail = []
         self.possible_values.update({
             'puzzle': puzzle,
             'unfilled_spaces': unfilled_spaces,
@@ -149,16 +279,17 @@ class Sodoku:
             'cols': cols,
             'groups': groups,
         })
+        self.stats.propagate_seconds += time.perf_counter() - start_time
 
     # Update sodoku state when placing a value into an unfilled space. Transition unfilled space with possible_values
     # to a set space with one definitive value
     def place_values(self, coord_values:List[Tuple]):
         for coord_value in coord_values:
             i, j, value = coord_value
-            if i < 0 or j < 0 or i >= SIZE or j >= SIZE:
+            if i < 0 or j < 0 or i >= self.size or j >= self.size:
                 raise ValueError("'i' and 'j' arguments must be > 0 and < the size of the puzzle", i, j)
-            if value is None or not isinstance(value, str) or re.match(r'\D', value):
-                raise ValueError("'value' argument must be a string containing a digit", value)
+            if not isinstance(value, str) or len(value) != 1 or value not in self.symbols:
+                raise ValueError("'value' argument must be a string containing one of " + self.symbols, value)
             if self.set_values['puzzle'][i][j] != 'X':
                 raise ValueError('Attempting to fill a space that is already filled', i, j, value)
             self.set_values['puzzle'][i][j] = value
@@ -176,94 +307,335 @@ class Sodoku:
             cols[j].add(value)
             groups[self.get_group_index(i, j)].add(value)
 
-        # Update possible_values
-        self.update_possible_values()
+            # Update possible_values of the placed space and its peers only
+            if self.possible_values['puzzle'] is not None:
+                self.update_peers(i, j, value)
+
+        if self.possible_values['puzzle'] is None:
+            self.update_possible_values()
+
+    # Remove a possible value's position (i, j) from the rows, cols, and groups indexes of possible_values
+    def remove_possible_position(self, i: int, j: int, value: str):
+        for constraint in [self.possible_values['rows'][i], self.possible_values['cols'][j],
+                           self.possible_values['groups'][self.get_group_index(i, j)]]:
+            coords = constraint.get(value)
+            if coords is not None:
+                coords.remove((i, j))
+                if not coords:
+                    del constraint[value]
+
+    # Add a possible value's position (i, j) back to the rows, cols, and groups indexes of possible_values. Positions
+    # are kept sorted so the indexes look exactly like they did before the position was removed
+    def add_possible_position(self, i: int, j: int, value: str):
+        for constraint in [self.possible_values['rows'][i], self.possible_values['cols'][j],
+                           self.possible_values['groups'][self.get_group_index(i, j)]]:
+            bisect.insort(constraint.setdefault(value, []), (i, j))
+
+    # Remove a possible value from an unfilled space and record it on the trail
+    def remove_possible_value(self, i: int, j: int, value: str):
+        possible_values = self.possible_values['puzzle'][i][j]
+        possible_values.remove(value)
+        self.remove_possible_position(i, j, value)
+        heapq.heappush(self.possible_values['unfilled_spaces'], (len(possible_values), (i, j)))
+        self.trail.append(('remove', i, j, value))
+
+    # Save the current puzzle state before making a guess. The heap is copied since lazy heap entries can not be undone
+    def save_state(self):
+        return len(self.trail), list(self.possible_values['unfilled_spaces'])
+
+    # Reset to a state returned by save_state by undoing every change on the trail made after it
+    def restore_state(self, state):
+        trail_length, unfilled_spaces = state
+        set_puzzle = self.set_values['puzzle']
+        possible_puzzle = self.possible_values['puzzle']
+        while len(self.trail) > trail_length:
+            change, i, j, value, *previous = self.trail.pop()
+            if change == 'remove':
+                possible_puzzle[i][j].add(value)
+                self.add_possible_position(i, j, value)
+            elif change == 'visit':
+                self.possible_values['visited'][i][j].remove(value)
+            elif change == 'place':
+                set_puzzle[i][j] = 'X'
+                self.set_values['rows'][i].remove(value)
+                self.set_values['cols'][j].remove(value)
+                self.set_values['groups'][self.get_group_index(i, j)].remove(value)
+                possible_puzzle[i][j] = previous[0]
+                for possible_value in previous[0]:
+                    self.add_possible_position(i, j, possible_value)
+        self.possible_values['unfilled_spaces'] = list(unfilled_spaces)
+
+    # Incrementally update possible_values after value was placed at (i, j). Only the placed space and its peers
+    # (the spaces sharing a row, col, or group with it) can lose possible values
+    def update_peers(self, i: int, j: int, value: str):
+        possible_puzzle = self.possible_values['puzzle']
+        for possible_value in possible_puzzle[i][j]:
+            self.remove_possible_position(i, j, possible_value)
+        self.trail.append(('place', i, j, value, possible_puzzle[i][j]))
+        possible_puzzle[i][j] = {value}
+        for k, l in self.peers[i][j]:
+            if self.set_values['puzzle'][k][l] == 'X' and value in possible_puzzle[k][l]:
+                self.remove_possible_value(k, l, value)
+
+    # Mark a possible value of an unfilled space as visited so it is never placed there again on this decision path
+    def exclude_value(self, i: int, j: int, value: str):
+        if value not in self.possible_values['visited'][i][j]:
+            self.possible_values['visited'][i][j].add(value)
+            self.trail.append(('visit', i, j, value))
+        if value in self.possible_values['puzzle'][i][j]:
+            self.remove_possible_value(i, j, value)
 
     # Fill in any spots that must have one solution
     # Return True if puzzle is solved
     # TODO: Break this method into using smaller methods for each of the two approaches
     def fill_trivial_spaces(self):
-        was_changed = False
         if self.possible_values['unfilled_spaces'] is None:
             self.update_possible_values()
 
-        # If any spot has only 1 possible value, then that space must have that possible value as the answer
-        # unfilled_space is a tuple of (<length of possible_values>, <(i, j) coordinates of space>)
-        unfilled_space = self.possible_values['unfilled_spaces'][0]
-        # If we already have unfilled spaces with no possible values, then we're already in an unsolvable state
-        if unfilled_space[0] < 1:
-            raise ValueError('Puzzle is invalid and unsolvable')
-        # We are only looking at the beginning of the min heap unfilled_spaces with 1 possible value
-        if unfilled_space[0] == 1:
-            i, j = unfilled_space[1]
-            # Take the one and only element in possible_values['puzzle'] at i, j and place that in the unfilled space
-            self.place_values([(i, j, self.possible_values['puzzle'][i][j].pop())])
-            was_changed = True
-
-        # If any constraint has only 1 spot a possible value can possibly be placed, then that value can only be placed
-        # in that space
-        # O(3 * SIZE * SIZE)
-        for constraints in [self.possible_values['rows'], self.possible_values['cols'], self.possible_values['groups']]:
-            coord_values = []
-            for constraint in constraints:
-                for value, coords in constraint.items():
-                    if len(coords) == 1:
-                        coord = coords[0]
-                        coord_values.append((coord[0], coord[1], value))
-                        was_changed = True
-            self.place_values(coord_values)
-            # Since we're mutating the values we're iterating over, we need to exit the loop if anything was changed
-            if was_changed:
-                break
-
-        if self.is_solved():
-            return True
-        elif was_changed:
-            return self.fill_trivial_spaces()
+        # Keep filling spaces until nothing changes instead of recursing once per pass
+        while True:
+            was_changed = False
+            # If any spot has only 1 possible value, then that space must have that possible value as the answer
+            # unfilled_space is a tuple of (<length of possible_values>, <(i, j) coordinates of space>)
+            unfilled_space = self.get_most_constrained_space()
+            if unfilled_space is None:
+                return True
+            # If we already have unfilled spaces with no possible values, then we're already in an unsolvable state
+            if unfilled_space[0] < 1:
+                raise ValueError('Puzzle is invalid and unsolvable')
+            # We are only looking at the beginning of the min heap unfilled_spaces with 1 possible value
+            if unfilled_space[0] == 1:
+                i, j = unfilled_space[1]
+                # Take the one and only element in possible_values['puzzle'] at i, j and place that in the unfilled
+                # space
+                self.place_values([(i, j, next(iter(self.possible_values['puzzle'][i][j])))])
+                self.stats.naked_singles += 1
+                was_changed = True
+
+            # If any constraint has only 1 spot a possible value can possibly be placed, then that value can only be
+            # placed in that space
+            # O(3 * size * size)
+            for constraints in [self.possible_values['rows'], self.possible_values['cols'],
+                                self.possible_values['groups']]:
+                coord_values = []
+                for constraint in constraints:
+                    for value, coords in constraint.items():
+                        if len(coords) == 1:
+                            coord = coords[0]
+                            coord_values.append((coord[0], coord[1], value))
+                            was_changed = True
+                self.place_values(coord_values)
+                self.stats.hidden_singles += len(coord_values)
+                # Since we're mutating the values we're iterating over, we need to exit the loop if anything was changed
+                if was_changed:
+                    break
+
+            if not was_changed:
+                was_changed = self.apply_rules()
+
+            if self.is_solved():
+                return True
+            if not was_changed:
+                return False
+
+    # Try the propagation rules in order and remove the possible values of the first one that finds anything
+    # Return true if any possible value was removed
+    def apply_rules(self) -> bool:
+        for rule in self.rules:
+            eliminations = RULES[rule](self)
+            if eliminations:
+                for i, j, value in eliminations:
+                    self.remove_possible_value(i, j, value)
+                self.eliminations[rule] += len(eliminations)
+                return True
         return False
 
     # Main solve method!
-    def solve(self):
+    # backend picks the engine doing the search: 'sets' for this class or one of BACKENDS ('bitmask' for the compact
+    # BitmaskSodoku engine, 'dlx' for the DLXSodoku exact cover solver)
+    # timeout (in seconds), max_nodes (decision paths), and cancel (a CancellationToken) stop the search early. They
+    # are only supported by the 'sets' backend. If a limit is reached, the puzzle is put back as it was,
+    # so it can be solved again with other limits
+    def solve(self, backend: str = 'sets', timeout: Optional[float] = None, max_nodes: Optional[int] = None,
+              cancel: Optional[CancellationToken] = None) -> SolveResult:
         start_time = time.time()
-        self.init_set_values()
-        self.update_possible_values()
-        if self.solve_helper():
+        result = self.find_solution(backend, timeout, max_nodes, cancel)
+        if result.status == SOLVED:
             print('Solution found in {} seconds!'.format(time.time() - start_time))
             self.pretty_print()
-        else:
+        elif result.status == UNSOLVABLE:
             print('This sodoku puzzle is unsolvable.')
+        else:
+            print('Search stopped ({}) after {} decision paths.'.format(result.status, self.stats.nodes))
+        return result
+
+    # solve without printing anything
+    def find_solution(self, backend: str = 'sets', timeout: Optional[float] = None, max_nodes: Optional[int] = None,
+                      cancel: Optional[CancellationToken] = None) -> SolveResult:
+        if backend != 'sets' and (timeout is not None or max_nodes is not None or cancel is not None):
+            raise ValueError('Limits are only supported by the sets backend', backend)
+        self.init_set_values()
+        self.deadline = None if timeout is None else time.perf_counter() + timeout
+        self.max_nodes = max_nodes
+        self.cancel = cancel
+        self.best_partial = None
+        # A search stopped by a limit is left in the middle of a guess, so it is undone back to this state
+        state = None
+        if backend == 'sets':
+            if self.possible_values['puzzle'] is None:
+                self.update_possible_values()
+            state = self.save_state()
+        try:
+            status = SOLVED if self.solve_backend(backend) else UNSOLVABLE
+        except SolveLimitReached as limit:
+            status = limit.status
+        finally:
+            self.deadline = self.max_nodes = self.cancel = None
+
+        puzzle = self.set_values['puzzle']
+        if status not in (SOLVED, UNSOLVABLE):
+            puzzle = [row[:] for row in self.best_partial or puzzle]
+            self.restore_state(state)
+            return SolveResult(status, puzzle, self.stats)
+        return SolveResult(status, [row[:] for row in puzzle], self.stats)
+
+    # Run the search with the given backend and copy its solution back into this puzzle
+    # Return true if puzzle is solved
+    def solve_backend(self, backend: str) -> bool:
+        if backend == 'sets':
+            if self.possible_values['puzzle'] is None:
+                self.update_possible_values()
+            return self.solve_helper()
+        engine = get_backend(backend)(self.set_values['puzzle'])
+        solution = engine.solve()
+        self.stats.nodes += engine.threads
+        if solution is None:
+            return False
+        for i in range(self.size):
+            self.set_values['puzzle'][i][:] = solution[i]
+        # Other backends don't use possible_values, so they are only built if they are asked for
+        self.init_set_values()
+        self.possible_values.update({'puzzle': None, 'unfilled_spaces': None})
+        return True
 
     # Try to solve by filling trivial spaces first.
-    # If that doesn't work, make guesses and recurse through different decision tree paths
+    # If that doesn't work, make guesses and walk through different decision tree paths with an explicit stack
     # Return true if puzzle is solved
     def solve_helper(self):
-        self.threads += 1
-        if self.threads % 1000 == 0:
-            print('{} decision paths have been explored!'.format(self.threads))
-            sodoku.pretty_print()
-        if self.is_solved():
-            return True
+        return next(self.iter_solutions(), None) is not None
+
+    # Walk through every decision tree path, yielding a copy of each solution as a 2D matrix. While the generator is
+    # paused on a solution, the puzzle holds that solution. Resuming backs out of it and keeps searching
+    # Time spent searching is added to stats, leaving out the time the generator is paused and the time spent
+    # propagating, which is counted on its own
+    def iter_solutions(self) -> Iterator[List[List[str]]]:
+        search = self.search()
+        while True:
+            start_time = time.perf_counter()
+            propagate_seconds = self.stats.propagate_seconds
+            try:
+                solution = next(search, None)
+            finally:
+                self.stats.search_seconds += (time.perf_counter() - start_time
+                                              - (self.stats.propagate_seconds - propagate_seconds))
+            if solution is None:
+                return
+            yield solution
+
+    # Generator doing the work of iter_solutions
+    def search(self) -> Iterator[List[List[str]]]:
         try:
-            if self.fill_trivial_spaces():
-                return True
+            if self.visit_decision_path():
+                yield [row[:] for row in self.set_values['puzzle']]
+                return
         except ValueError:
-            return False
-        while len(self.possible_values['unfilled_spaces']) > 0:
-            i, j = heapq.heappop(self.possible_values['unfilled_spaces'])[1]
-            for possible_value in self.possible_values['puzzle'][i][j]:
-                # Save a copy of current puzzle state before making guesses and recursing through decision paths
-                set_values_copy = copy.deepcopy(self.set_values)
-                possible_values_copy = copy.deepcopy(self.possible_values)
-                self.place_values([(i, j, possible_value)])
-                if self.solve_helper():
-                    return True
-                # Reset to previous state after determining that the guess did not leave to a solution
-                self.set_values = set_values_copy
-                self.possible_values = possible_values_copy
-                self.possible_values['visited'][i][j].add(possible_value)
-        return False
+            return
+        # Each decision on the stack is [i, j, possible values left to guess, state before guessing, current guess]
+        stack = [self.make_decision()]
+        self.stats.max_depth = max(self.stats.max_depth, len(stack))
+        while stack:
+            decision = stack[-1]
+            i, j, guesses, state, guess = decision
+            if guess is not None:
+                # Reset to previous state after the guess was solved or determined not to lead to a solution
+                self.restore_state(state)
+                self.stats.backtracks += 1
+                self.exclude_value(i, j, guess)
+                decision[3] = self.save_state()
+                decision[4] = None
+            # If none of the possible values of the space lead to a solution, no other space can either, so this
+            # decision path is done
+            if not guesses:
+                stack.pop()
+                continue
+            guess = decision[4] = guesses.pop()
+            try:
+                self.place_values([(i, j, guess)])
+                if self.visit_decision_path():
+                    # Every space is filled, so this guess has no other solutions
+                    yield [row[:] for row in self.set_values['puzzle']]
+                    continue
+            except ValueError:
+                continue
+            stack.append(self.make_decision())
+            self.stats.max_depth = max(self.stats.max_depth, len(stack))
+
+    # Count the solutions of the puzzle, stopping as soon as limit of them are found (never if limit is None)
+    # The puzzle is left as it was
+    def count_solutions(self, limit: Optional[int] = None) -> int:
+        if self.possible_values['puzzle'] is None:
+            self.update_possible_values()
+        state = self.save_state()
+        count = 0
+        for _ in itertools.islice(self.iter_solutions(), limit):
+            count += 1
+        self.restore_state(state)
+        return count
 
-    # Randomly generate solvable puzzles, taking in difficulty ratio
+    # Return true if the puzzle has exactly one solution. Searching stops at the second one
+    def is_unique(self) -> bool:
+        return self.count_solutions(limit=2) == 1
+
+    # Count a new decision path and fill trivial spaces on it
+    # Return true if puzzle is solved. Raise ValueError if this decision path can not be solved
+    def visit_decision_path(self):
+        limited = self.deadline is not None or self.max_nodes is not None or self.cancel is not None
+        if limited:
+            self.check_limits()
+        self.stats.nodes += 1
+        if self.progress is not None and self.stats.nodes % self.progress_interval == 0:
+            self.progress(self)
+        start_time = time.perf_counter()
+        try:
+            solved = self.fill_trivial_spaces()
+        finally:
+            self.stats.propagate_seconds += time.perf_counter() - start_time
+        if limited:
+            self.remember_partial()
+        return solved
+
+    # Raise SolveLimitReached if the search was cancelled, explored max_nodes decision paths, or ran out of time
+    def check_limits(self):
+        if self.cancel is not None and self.cancel.is_cancelled():
+            raise SolveLimitReached(CANCELLED)
+        if self.max_nodes is not None and self.stats.nodes >= self.max_nodes:
+            raise SolveLimitReached(NODE_LIMIT)
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SolveLimitReached(TIMED_OUT)
+
+    # Keep a copy of the board if it has fewer unfilled spaces than best_partial
+    def remember_partial(self):
+        puzzle = self.set_values['puzzle']
+        unfilled = sum(row.count('X') for row in puzzle)
+        if self.best_partial is None or unfilled < sum(row.count('X') for row in self.best_partial):
+            self.best_partial = [row[:] for row in puzzle]
+
+    # Pick the next space to guess on with the configured heuristics and save the state before guessing
+    def make_decision(self):
+        i, j = self.choose_space(self)
+        # Guesses are popped from the end, so store them in reverse order
+        guesses = list(reversed(self.order_values(self, i, j)))
+        return [i, j, guesses, self.save_state(), None]
 
     # Pretty print puzzle
     def pretty_print(self):
@@ -272,7 +644,118 @@ class Sodoku:
         print()
 
 
+# Progress callback for interactive use: print how many decision paths have been explored and the current board
+def print_progress(sodoku: Sodoku):
+    print('{} decision paths have been explored!'.format(sodoku.stats.nodes))
+    sodoku.pretty_print()
+
+
+# Space heuristics take a Sodoku that is not solved and return the (i, j) coordinates of the space to guess on
+
+# Minimum remaining values: the top of the unfilled_spaces heap
+def choose_min_remaining_values(sodoku: Sodoku) -> Tuple[int, int]:
+    return sodoku.get_most_constrained_space()[1]
+
+
+# Minimum remaining values, breaking ties by the space with the most unfilled peers
+def choose_min_remaining_values_degree(sodoku: Sodoku) -> Tuple[int, int]:
+    fewest = sodoku.get_most_constrained_space()[0]
+    set_puzzle = sodoku.set_values['puzzle']
+    possible_puzzle = sodoku.possible_values['puzzle']
+    best_coord = None
+    best_degree = -1
+    for i in range(sodoku.size):
+        for j in range(sodoku.size):
+            if set_puzzle[i][j] != 'X' or len(possible_puzzle[i][j]) != fewest:
+                continue
+            degree = sum(1 for k, l in sodoku.peers[i][j] if set_puzzle[k][l] == 'X')
+            if degree > best_degree:
+                best_coord = (i, j)
+                best_degree = degree
+    return best_coord
+
+
+# Value heuristics take a Sodoku and the coordinates of a space and return the possible values in the order they
+# should be guessed
+
+# Symbols in ascending order
+def order_ascending(sodoku: Sodoku, i: int, j: int) -> List[str]:
+    return sorted(sodoku.possible_values['puzzle'][i][j])
+
+
+# Least constraining value: values that remove the fewest possible values from unfilled peers come first
+def order_least_constraining(sodoku: Sodoku, i: int, j: int) -> List[str]:
+    set_puzzle = sodoku.set_values['puzzle']
+    possible_puzzle = sodoku.possible_values['puzzle']
+
+    def constrained_peers(value: str) -> int:
+        return sum(1 for k, l in sodoku.peers[i][j] if set_puzzle[k][l] == 'X' and value in possible_puzzle[k][l])
+
+    return sorted(possible_puzzle[i][j], key=lambda value: (constrained_peers(value), value))
+
+
+SPACE_HEURISTICS = {
+    'mrv': choose_min_remaining_values,
+    'mrv_degree': choose_min_remaining_values_degree,
+}
+
+VALUE_HEURISTICS = {
+    'ascending': order_ascending,
+    'lcv': order_least_constraining,
+}
+
+# Alternative engines that can be selected with Sodoku.solve(backend=...), as (module, class) names. Each takes the
+# 2D puzzle and returns the solved 2D puzzle from solve(), or None if it is unsolvable. They are only imported once
+# they are used, so importing this module stays cheap
+BACKENDS = {
+    'bitmask': ('sodoku_bitmask', 'BitmaskSodoku'),
+    'dlx': ('sodoku_dlx', 'DLXSodoku'),
+}
+
+
+# Engine class of one of BACKENDS
+def get_backend(backend: str) -> type:
+    if backend not in BACKENDS:
+        raise ValueError('Unknown backend', backend)
+    module, name = BACKENDS[backend]
+    return getattr(importlib.import_module(module), name)
+
+
+# Parse a puzzle written on one line, row after row, into a 2D matrix. X, ., and 0 are unfilled spaces
+# The puzzle size is taken from the length of the line (81 characters for 9x9, 256 for 16x16, 625 for 25x25)
+# line can also be ASCII bytes
+def puzzle_from_string(line: Union[str, bytes]) -> List[List[str]]:
+    if isinstance(line, bytes):
+        line = line.decode('ascii')
+    line = re.sub(r'[.0]', 'X', line.strip())
+    size = math.isqrt(len(line))
+    if size * size != len(line):
+        raise ValueError('A puzzle line must have a square number of characters in it!', line)
+    symbols = get_symbols(get_box_size(size) ** 2)
+    if any(char != 'X' and char not in symbols for char in line):
+        raise ValueError('A puzzle line can only contain {} and X, ., or 0 for unfilled spaces'.format(symbols), line)
+    return [list(line[i:i + size]) for i in range(0, size * size, size)]
+
+
+# Write a 2D matrix puzzle on one line, row after row
+def puzzle_to_string(puzzle: List[List[str]]) -> str:
+    return ''.join(''.join(row) for row in puzzle)
+
+
+# Solve a puzzle without printing, asking for input, or changing the puzzle passed in
+# puzzle is a one line puzzle string or bytes (like the 81 characters of a 9x9 puzzle) or a 2D matrix. options are
+# passed on to Sodoku (space_heuristic, value_heuristic, rules) and limits work as in Sodoku.solve
+# Raise ValueError if the puzzle is invalid
+def solve_puzzle(puzzle: Union[str, bytes, List[List[str]]], backend: str = 'sets', timeout: Optional[float] = None,
+                 max_nodes: Optional[int] = None, cancel: Optional[CancellationToken] = None,
+                 **options) -> PuzzleResult:
+    sodoku = Sodoku(puzzle, **options)
+    status, grid, stats = sodoku.find_solution(backend, timeout, max_nodes, cancel)
+    return PuzzleResult(status, tuple(''.join(row) for row in grid), stats.as_dict())
+
+
 if __name__ == '__main__':
-    sodoku = Sodoku()
+    # Optionally pass the group width for bigger puzzles, like 4 for 16x16
+    sodoku = Sodoku(box_size=int(sys.argv[1]) if len(sys.argv) > 1 else BOX_SIZE, progress=print_progress)
     sodoku.get_input_and_parse()
     sodoku.solve()
@@ -1,4 +1,7 @@
+import copy
+import io
 import unittest
+from contextlib import redirect_stdout
 import sodoku_solver
 
 # Size of sodoku puzzle. Default is 9x9
@@ -55,7 +58,15 @@ class TestSodokuSolverMethods(unittest.TestCase):
 
     exampleWrongPuzzle = [[str(i) for i in range(1, SIZE + 1)] for j in range(1, SIZE + 1)]
 
+    exampleSmallPuzzle = '3.....3...23.3.4'
+
+    exampleBigPuzzle = ('..DA.4.9....C25.' 'F.....G7C2..B.D.' '.....2..B.DA.4.9' 'C...B6..F4.9E.G.'
+                        '...F.1....7C25.B' '4..E.G...58B..A.' '.G7C2.8..D.F4...' '...B......9...7.'
+                        '.AF419...7C2...6' '...3G...5.B..AF.' 'G7C....6..F..9..' '.8.6DAF4..E.G.C.'
+                        '.F4...3..C.58..D' '9.3.7.258B..A..1' '.C.5..6..F4.....' '.B..A.419E..7..5')
+
     def setUp(self):
+        # Sodoku copies the puzzle it is given, so the examples can be shared by every test
         self.sodokuEasy = sodoku_solver.Sodoku(self.exampleEasyPuzzle)
         self.sodokuMedium = sodoku_solver.Sodoku(self.exampleMediumPuzzle)
         self.sodokuHard = sodoku_solver.Sodoku(self.exampleHardPuzzle)
@@ -178,6 +189,30 @@ class TestSodokuSolverMethods(unittest.TestCase):
         self.assertEqual(self.sodokuHard.possible_values['cols'][2]['5'], [(6, 2), (7, 2), (8, 2)])
         self.assertEqual(self.sodokuHard.possible_values['groups'][6]['5'], [(6, 2), (7, 2), (8, 2)])
 
+    def test_place_values_matches_rebuild(self):
+        sodoku = sodoku_solver.Sodoku(self.exampleHardPuzzle2)
+        sodoku.update_possible_values()
+        sodoku.place_values([(0, 0, '2'), (4, 0, '8')])
+        rebuilt = sodoku_solver.Sodoku(sodoku.set_values['puzzle'])
+        rebuilt.update_possible_values()
+        for key in ['rows', 'cols', 'groups', 'puzzle']:
+            self.assertEqual(sodoku.possible_values[key], rebuilt.possible_values[key])
+        self.assertEqual(sodoku.get_most_constrained_space(), rebuilt.get_most_constrained_space())
+
+    def test_restore_state(self):
+        sodoku = sodoku_solver.Sodoku(self.exampleHardPuzzle)
+        sodoku.update_possible_values()
+        set_values_before = copy.deepcopy(sodoku.set_values)
+        possible_values_before = copy.deepcopy(sodoku.possible_values)
+        state = sodoku.save_state()
+        sodoku.place_values([(2, 1, '5')])
+        sodoku.exclude_value(5, 0, '3')
+        sodoku.fill_trivial_spaces()
+        sodoku.restore_state(state)
+        self.assertEqual(sodoku.set_values, set_values_before)
+        self.assertEqual(sodoku.possible_values, possible_values_before)
+        self.assertEqual(sodoku.trail, [])
+
     def test_fill_trivial_spaces(self):
         self.sodokuEasy.update_possible_values()
         self.sodokuMedium.update_possible_values()
@@ -190,6 +225,192 @@ class TestSodokuSolverMethods(unittest.TestCase):
         self.assertFalse(self.sodokuHard.fill_trivial_spaces())
         self.assertFalse(self.sodokuHard.is_solved())
 
+    def test_heuristics(self):
+        self.sodokuHard2.update_possible_values()
+        self.assertEqual(sodoku_solver.choose_min_remaining_values(self.sodokuHard2), (0, 6))
+        # (3, 7) also has 2 possible values but 13 unfilled peers instead of 10
+        self.assertEqual(sodoku_solver.choose_min_remaining_values_degree(self.sodokuHard2), (3, 7))
+        self.assertEqual(sodoku_solver.order_ascending(self.sodokuHard2, 0, 6), ['2', '5'])
+        # 9 unfilled peers of (0, 6) could hold a 2 but only 5 could hold a 5
+        self.assertEqual(sodoku_solver.order_least_constraining(self.sodokuHard2, 0, 6), ['5', '2'])
+        with self.assertRaises(ValueError):
+            sodoku_solver.Sodoku(space_heuristic='unknown')
+        with self.assertRaises(ValueError):
+            sodoku_solver.Sodoku(value_heuristic='unknown')
+
+        for space_heuristic in sodoku_solver.SPACE_HEURISTICS:
+            for value_heuristic in sodoku_solver.VALUE_HEURISTICS:
+                sodoku = sodoku_solver.Sodoku(self.exampleHardPuzzle, space_heuristic, value_heuristic)
+                sodoku.solve()
+                self.assertTrue(sodoku.is_solved())
+
+    def test_solve_empty_puzzle(self):
+        # Every guess used to add a Python frame, so sparse puzzles could hit the recursion limit
+        sodoku = sodoku_solver.Sodoku([['X'] * SIZE for i in range(SIZE)])
+        sodoku.solve()
+        self.assertTrue(sodoku.is_solved())
+
+    def test_puzzle_from_string(self):
+        line = '1.70.6XXX' + 'X' * 72
+        puzzle = sodoku_solver.puzzle_from_string(line + '\n')
+        self.assertEqual(puzzle[0], ['1', 'X', '7', 'X', 'X', '6', 'X', 'X', 'X'])
+        self.assertEqual(len(puzzle), 9)
+        self.assertEqual(sodoku_solver.puzzle_to_string(self.exampleEasyPuzzle)[:9], '1X7XX6XXX')
+        with self.assertRaises(ValueError):
+            sodoku_solver.puzzle_from_string(line[1:])
+        with self.assertRaises(ValueError):
+            sodoku_solver.puzzle_from_string('a' + line[1:])
+
+    def test_count_solutions(self):
+        self.assertEqual(self.sodokuHard2.count_solutions(), 1)
+        self.assertTrue(self.sodokuHard2.is_unique())
+        # Counting leaves the puzzle as it was, so it can still be solved afterwards
+        self.assertEqual(self.sodokuHard2.set_values['puzzle'], self.exampleHardPuzzle2)
+        self.sodokuHard2.solve()
+        self.assertTrue(self.sodokuHard2.is_solved())
+
+        self.assertEqual(self.sodokuHard.count_solutions(limit=5), 5)
+        self.assertFalse(self.sodokuHard.is_unique())
+        self.assertEqual(self.sodokuHard.set_values['puzzle'], self.exampleHardPuzzle)
+        # There are 288 complete 4x4 boards
+        small = sodoku_solver.Sodoku(sodoku_solver.puzzle_from_string('.' * 16))
+        self.assertEqual(small.count_solutions(), 288)
+        with self.assertRaises(ValueError):
+            self.sodokuWrong.count_solutions()
+
+    def test_stats(self):
+        calls = []
+        sodoku = sodoku_solver.Sodoku(self.exampleHardPuzzle2, rules=[],
+                                      progress=lambda sodoku: calls.append(sodoku.stats.nodes), progress_interval=2)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            sodoku.solve_backend('sets')
+        # Progress goes to the callback instead of stdout
+        self.assertEqual(output.getvalue(), '')
+        stats = sodoku.stats
+        self.assertEqual(sodoku.threads, stats.nodes)
+        self.assertEqual(calls, list(range(2, stats.nodes + 1, 2)))
+        self.assertGreater(stats.backtracks, 0)
+        self.assertLess(stats.backtracks, stats.nodes)
+        self.assertGreaterEqual(stats.max_depth, 1)
+        self.assertGreater(stats.naked_singles + stats.hidden_singles, 0)
+        self.assertGreater(stats.propagate_seconds, 0)
+        self.assertGreater(stats.search_seconds, 0)
+        # Filling trivial spaces on every decision path is counted as propagation, not as search
+        sodoku = sodoku_solver.Sodoku(self.exampleHardPuzzle2, rules=[])
+        sodoku.update_possible_values()
+        rebuild_seconds = sodoku.stats.propagate_seconds
+        sodoku.visit_decision_path()
+        self.assertGreater(sodoku.stats.propagate_seconds, rebuild_seconds)
+        self.assertEqual(sodoku.stats.search_seconds, 0)
+        self.assertEqual(stats.as_dict()['nodes'], stats.nodes)
+
+        sodoku = sodoku_solver.Sodoku(self.exampleHardPuzzle2, rules=sodoku_solver.PAIR_RULES)
+        sodoku.solve_backend('sets')
+        self.assertIs(sodoku.eliminations, sodoku.stats.eliminations)
+        self.assertEqual(sodoku.stats.as_dict()['eliminations_pointing_pairs'], sodoku.eliminations['pointing_pairs'])
+
+        merged = sodoku_solver.SolverStats(['pointing_pairs'])
+        merged.merge(stats)
+        merged.merge(sodoku.stats)
+        self.assertEqual(merged.nodes, stats.nodes + sodoku.stats.nodes)
+        self.assertEqual(merged.max_depth, max(stats.max_depth, sodoku.stats.max_depth))
+        self.assertEqual(merged.eliminations, sodoku.eliminations)
+
+    def test_solve_limits(self):
+        # Without propagation rules this puzzle needs dozens of decision paths
+        puzzle = sodoku_solver.puzzle_from_string(
+            '1....7.9..3..2...8..96..5....53..9...1..8...26....4...3......1..4......7..7...3..')
+        with redirect_stdout(io.StringIO()):
+            result = sodoku_solver.Sodoku(puzzle, rules=[]).solve(max_nodes=5)
+            self.assertEqual(result.status, sodoku_solver.NODE_LIMIT)
+            self.assertEqual(result.stats.nodes, 5)
+            for i in range(9):
+                for j in range(9):
+                    if puzzle[i][j] != 'X':
+                        self.assertEqual(result.puzzle[i][j], puzzle[i][j])
+            self.assertLess(sum(row.count('X') for row in result.puzzle), sum(row.count('X') for row in puzzle))
+
+            # The search is undone when it stops, so it can be retried with a bigger budget
+            sodoku = sodoku_solver.Sodoku(puzzle, rules=[])
+            self.assertEqual(sodoku.solve(max_nodes=3).status, sodoku_solver.NODE_LIMIT)
+            self.assertEqual(sodoku.set_values['puzzle'], puzzle)
+            result = sodoku.solve(max_nodes=10 ** 6)
+            self.assertEqual(result.status, sodoku_solver.SOLVED)
+            self.assertTrue(sodoku_solver.Sodoku(result.puzzle).is_solved())
+
+            result = sodoku_solver.Sodoku(puzzle, rules=[]).solve(timeout=0)
+            self.assertEqual((result.status, result.stats.nodes), (sodoku_solver.TIMED_OUT, 0))
+
+            token = sodoku_solver.CancellationToken()
+            sodoku = sodoku_solver.Sodoku(puzzle, rules=[], progress=lambda sodoku: token.cancel(),
+                                          progress_interval=3)
+            result = sodoku.solve(cancel=token)
+            self.assertEqual((result.status, result.stats.nodes), (sodoku_solver.CANCELLED, 3))
+
+            result = sodoku_solver.Sodoku(puzzle, rules=[]).solve(timeout=60, max_nodes=10 ** 6)
+            self.assertEqual(result.status, sodoku_solver.SOLVED)
+            self.assertTrue(sodoku_solver.Sodoku(result.puzzle).is_solved())
+            # (0, 8) can only be a 9, but there is already a 9 in its col
+            unsolvable = sodoku_solver.puzzle_from_string('12345678X' + 'XXXXXXXX9' + 'X' * 63)
+            self.assertEqual(sodoku_solver.Sodoku(unsolvable).solve(max_nodes=5).status, sodoku_solver.UNSOLVABLE)
+            with self.assertRaises(ValueError):
+                sodoku_solver.Sodoku(puzzle).solve(backend='dlx', timeout=1)
+
+    def test_other_sizes(self):
+        small = sodoku_solver.Sodoku(sodoku_solver.puzzle_from_string(self.exampleSmallPuzzle))
+        self.assertEqual((small.box_size, small.size, small.symbols), (2, 4, '1234'))
+        self.assertEqual(small.get_group_index(3, 3), 3)
+        small.solve()
+        self.assertTrue(small.is_solved())
+        self.assertEqual(small.set_values['puzzle'][3][3], '4')
+
+        big = sodoku_solver.Sodoku(sodoku_solver.puzzle_from_string(self.exampleBigPuzzle))
+        self.assertEqual((big.box_size, big.size), (4, 16))
+        big.update_possible_values()
+        self.assertNotIn('G', big.possible_values['puzzle'][0][0])
+        with self.assertRaises(ValueError):
+            big.place_values([(0, 0, 'H')])
+        big.solve()
+        self.assertTrue(big.is_solved())
+        for row in big.set_values['puzzle']:
+            self.assertEqual(set(row), set(big.symbols))
+
+        with self.assertRaises(ValueError):
+            sodoku_solver.Sodoku([['X'] * 8 for i in range(8)])
+        with self.assertRaises(ValueError):
+            sodoku_solver.Sodoku([['A'] + ['X'] * 8] + [['X'] * 9 for i in range(8)]).init_set_values()
+        with self.assertRaises(ValueError):
+            sodoku_solver.puzzle_from_string('H' + self.exampleBigPuzzle[1:])
+
+    def test_solve_puzzle(self):
+        line = sodoku_solver.puzzle_to_string(self.exampleHardPuzzle2)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            result = sodoku_solver.solve_puzzle(line)
+            self.assertEqual(sodoku_solver.solve_puzzle(line.encode())[:2], result[:2])
+            self.assertEqual(sodoku_solver.solve_puzzle(self.exampleHardPuzzle2, backend='dlx').grid, result.grid)
+        self.assertEqual(output.getvalue(), '')
+        self.assertEqual(result.status, sodoku_solver.SOLVED)
+        self.assertEqual(len(result.grid), 9)
+        self.assertTrue(sodoku_solver.Sodoku(result.line).is_solved())
+        self.assertEqual(result.stats['nodes'], sodoku_solver.Sodoku(line).find_solution().stats.nodes)
+        self.assertEqual(sodoku_solver.solve_puzzle(line, max_nodes=1, rules=[]).status, sodoku_solver.NODE_LIMIT)
+        with self.assertRaises(ValueError):
+            sodoku_solver.solve_puzzle(sodoku_solver.puzzle_to_string(self.exampleWrongPuzzle))
+        # Without a puzzle there is nothing to solve, instead of asking for one
+        with self.assertRaises(ValueError):
+            sodoku_solver.Sodoku().find_solution()
+
+    def test_puzzle_not_changed(self):
+        puzzle = [row[:] for row in self.exampleHardPuzzle2]
+        sodoku = sodoku_solver.Sodoku(puzzle)
+        with redirect_stdout(io.StringIO()):
+            sodoku.solve()
+        self.assertTrue(sodoku.is_solved())
+        self.assertEqual(puzzle, self.exampleHardPuzzle2)
+        self.assertIn('X', puzzle[0])
+
     def test_solved(self):
         self.sodokuEasy.solve()
         self.assertTrue(self.sodokuEasy.is_solved())
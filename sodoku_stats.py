@@ -0,0 +1,47 @@
+from typing import Dict, Iterable
+
+
+# Counters and timers filled in by a Sodoku while it propagates and searches
+class SolverStats:
+    def __init__(self, rules: Iterable[str] = ()):
+        # nodes is the number of decision paths visited
+        self.nodes = 0
+        # backtracks is the number of guesses undone
+        self.backtracks = 0
+        # max_depth is the most guesses stacked on one decision path
+        self.max_depth = 0
+        # naked_singles and hidden_singles count the values placed by each kind of single
+        self.naked_singles = 0
+        self.hidden_singles = 0
+        # eliminations counts the possible values removed by each propagation rule
+        self.eliminations = {rule: 0 for rule in rules}
+        # propagate_seconds is the time spent building possible_values and filling trivial spaces on decision paths
+        # (singles and propagation rules), search_seconds the rest of the time spent searching
+        self.propagate_seconds = 0.0
+        self.search_seconds = 0.0
+
+    # Add the counts and times of other to these stats, like when one puzzle is searched in many pieces
+    def merge(self, other: 'SolverStats'):
+        self.nodes += other.nodes
+        self.backtracks += other.backtracks
+        self.max_depth = max(self.max_depth, other.max_depth)
+        self.naked_singles += other.naked_singles
+        self.hidden_singles += other.hidden_singles
+        for rule, count in other.eliminations.items():
+            self.eliminations[rule] = self.eliminations.get(rule, 0) + count
+        self.propagate_seconds += other.propagate_seconds
+        self.search_seconds += other.search_seconds
+
+    # Stats as a flat dict, ready for JSON or a metrics system
+    def as_dict(self) -> Dict[str, float]:
+        stats = {
+            'nodes': self.nodes,
+            'backtracks': self.backtracks,
+            'max_depth': self.max_depth,
+            'naked_singles': self.naked_singles,
+            'hidden_singles': self.hidden_singles,
+            'propagate_seconds': self.propagate_seconds,
+            'search_seconds': self.search_seconds,
+        }
+        stats.update({'eliminations_' + rule: count for rule, count in self.eliminations.items()})
+        return stats